@@ -0,0 +1,73 @@
+"""Initial analytics schema
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-15 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+from app.models.analytics import SCHEMA_NAME
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0001"
+down_revision: Union[str, Sequence[str], None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+event_type_enum = postgresql.ENUM(
+    "course_view", "course_enroll", name="event_type_enum", schema=SCHEMA_NAME
+)
+user_role_enum = postgresql.ENUM(
+    "learner", "instructor", name="user_role_enum", schema=SCHEMA_NAME
+)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute(f"CREATE SCHEMA IF NOT EXISTS {SCHEMA_NAME}")
+
+    op.create_table(
+        "analytics_events",
+        sa.Column("id", postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column("event_type", event_type_enum, nullable=False),
+        sa.Column("user_id", sa.String(24), nullable=True),
+        sa.Column("course_id", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column("user_role", user_role_enum, nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        schema=SCHEMA_NAME,
+    )
+    op.create_index(
+        "ix_events_course_created",
+        "analytics_events",
+        ["course_id", "created_at"],
+        schema=SCHEMA_NAME,
+    )
+
+    op.create_table(
+        "course_daily_metrics",
+        sa.Column("id", postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column("course_id", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column("metric_date", sa.Date(), nullable=False),
+        sa.Column("views_count", sa.Integer()),
+        sa.Column("enrollments_count", sa.Integer()),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.UniqueConstraint("course_id", "metric_date", name="uix_course_metric_date"),
+        schema=SCHEMA_NAME,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table("course_daily_metrics", schema=SCHEMA_NAME)
+    op.drop_index("ix_events_course_created", table_name="analytics_events", schema=SCHEMA_NAME)
+    op.drop_table("analytics_events", schema=SCHEMA_NAME)
+    user_role_enum.drop(op.get_bind(), checkfirst=True)
+    event_type_enum.drop(op.get_bind(), checkfirst=True)
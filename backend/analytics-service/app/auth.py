@@ -1,42 +1,80 @@
-from jose import jwt, JWTError, ExpiredSignatureError
+import hashlib
+import threading
+import time
+from cachetools import TTLCache
 from fastapi import HTTPException, status, Depends
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from .core.config import settings
+from .core.config import get_settings
 
-JWT_SECRET_KEY = settings.JWT_SECRET_KEY
-JWT_ALGORITHM = settings.JWT_ALGORITHM
+# Decoded tokens are cached so repeated requests with the same bearer token
+# skip signature verification. Entries never outlive the token's own `exp`.
+JWT_CACHE_TTL_SECONDS = 30
+_JWT_CACHE = TTLCache(maxsize=4096, ttl=JWT_CACHE_TTL_SECONDS)
+_JWT_CACHE_LOCK = threading.Lock()
 
 security = HTTPBearer()
 
+def _token_key(token: str) -> bytes:
+    """Hash the token so raw credentials are never kept in memory."""
+    return hashlib.blake2b(token.encode(), digest_size=16).digest()
+
 def decode_jwt(token: str):
     """
     Decodes a JWT token using the HS256 algorithm and the shared secret.
     Maps Node.js camelCase 'userId' to Pythonic 'user_id'.
     """
+    key = _token_key(token)
+    now = time.time()
+
+    with _JWT_CACHE_LOCK:
+        cached = _JWT_CACHE.get(key)
+    if cached is not None:
+        user, expires_at = cached
+        if expires_at > now:
+            return dict(user)
+        with _JWT_CACHE_LOCK:
+            _JWT_CACHE.pop(key, None)
+
+    # Imported on first use so the crypto stack stays off the startup path
+    import jwt
+
+    settings = get_settings()
     try:
         payload = jwt.decode(
             token,
-            JWT_SECRET_KEY,
-            algorithms=[JWT_ALGORITHM]
+            settings.JWT_SECRET_KEY,
+            algorithms=[settings.JWT_ALGORITHM],
+            options={"verify_aud": False}
         )
 
-        return {
-            "user_id": payload.get("userId"),
-            "role": payload.get("role"),
-        }
-
-    except ExpiredSignatureError:
+    except jwt.ExpiredSignatureError:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Token expired"
         )
 
-    except JWTError:
+    except jwt.PyJWTError:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid token"
         )
 
-def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)):
+    user = {
+        "user_id": payload.get("userId"),
+        "role": payload.get("role"),
+    }
+
+    # Never serve a cached entry past the token expiry
+    expires_at = now + JWT_CACHE_TTL_SECONDS
+    exp = payload.get("exp")
+    if exp is not None:
+        expires_at = min(expires_at, float(exp))
+    if expires_at > now:
+        with _JWT_CACHE_LOCK:
+            _JWT_CACHE[key] = (user, expires_at)
+
+    return dict(user)
+
+async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)):
     token = credentials.credentials
     return decode_jwt(token)
@@ -1,4 +1,5 @@
 import os
+from functools import lru_cache
 from pathlib import Path
 from pydantic_settings import BaseSettings, SettingsConfigDict
 from pydantic import Field
@@ -31,16 +32,19 @@ class Settings(BaseSettings):
         extra='ignore' # Allow other variables in .env without error
     )
 
-import logging
+@lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    # Note: setup_logging() will be called in main.py, so we use print for the very early bootstrap if needed
+    try:
+        return Settings()
+    except Exception as e:
+        print(f"❌ CONFIGURATION ERROR: Missing or invalid environment variables.")
+        print(f"Details: {e}")
+        import sys
+        sys.exit(1)
 
-logger = logging.getLogger(__name__)
-
-try:
-    settings = Settings()
-    # Note: setup_logging() will be called in main.py, so we use print for the very early bootstrap if needed, 
-    # but here we can just rely on the settings being initialized.
-except Exception as e:
-    print(f"❌ CONFIGURATION ERROR: Missing or invalid environment variables.")
-    print(f"Details: {e}")
-    import sys
-    sys.exit(1)
+def __getattr__(name: str):
+    # Backwards compatible `from .config import settings`, evaluated on access
+    if name == "settings":
+        return get_settings()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
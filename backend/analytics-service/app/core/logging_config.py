@@ -1,9 +1,10 @@
 import logging
 import sys
-from .config import settings
+from .config import get_settings
 
 def setup_logging():
     """Configure centralized logging for the application."""
+    settings = get_settings()
     log_level = getattr(logging, settings.LOG_LEVEL.upper(), logging.INFO)
     
     logging.basicConfig(
@@ -1,55 +1,198 @@
-import redis
-import json
-from typing import Any, Optional
-from .config import settings
-
-REDIS_HOST = settings.REDIS_HOST
-REDIS_PORT = settings.REDIS_PORT
-REDIS_TTL = settings.REDIS_TTL_SECONDS
+import asyncio
+from typing import Any, Awaitable, Callable, List, Optional, Tuple
+from .config import get_settings
 
 import logging
 
 logger = logging.getLogger(__name__)
 
-try:
-    redis_client = redis.Redis(
-        host=REDIS_HOST,
-        port=REDIS_PORT,
-        decode_responses=True,
-        socket_connect_timeout=1
-    )
-    # Test connection
-    redis_client.ping()
-    logger.info(f"Successfully connected to Redis at {REDIS_HOST}:{REDIS_PORT}")
-except Exception as e:
-    logger.warning(f"Could not connect to Redis: {e}. Caching will be disabled.")
-    redis_client = None
-
-def get_cache(key: str) -> Optional[Any]:
-    """Get data from Redis cache."""
-    if redis_client is None:
-        return None
+_client = None
+
+def _get_client():
+    """
+    Lazily build the Redis client on first use.
+    No connection is opened here; a down Redis makes individual calls fail
+    soft and caching is skipped for that request.
+    """
+    global _client
+    if _client is None:
+        import redis.asyncio as redis
+
+        settings = get_settings()
+        # Shared pool: callers wait briefly for a free connection instead of
+        # opening unbounded new ones under load
+        pool = redis.BlockingConnectionPool(
+            host=settings.REDIS_HOST,
+            port=settings.REDIS_PORT,
+            max_connections=32,
+            timeout=1,
+            decode_responses=False,
+            socket_connect_timeout=1
+        )
+        _client = redis.Redis(connection_pool=pool)
+    return _client
+
+async def get_cache_raw(key: str) -> Optional[bytes]:
+    """Get bytes stored by set_cache, e.g. a serialized response body."""
     try:
-        data = redis_client.get(key)
-        return json.loads(data) if data else None
+        return await _get_client().get(key)
     except Exception as e:
         logger.error(f"Redis get error for key {key}: {e}")
         return None
 
-def set_cache(key: str, value: Any, ttl: int = REDIS_TTL):
-    """Set data in Redis cache with TTL."""
-    if redis_client is None:
-        return
+async def set_cache(key: str, value: bytes, ttl: Optional[int] = None):
+    """Set raw bytes in Redis cache with TTL."""
+    if ttl is None:
+        ttl = get_settings().REDIS_TTL_SECONDS
     try:
-        redis_client.setex(key, ttl, json.dumps(value))
+        await _get_client().setex(key, ttl, value)
     except Exception as e:
         logger.error(f"Redis set error for key {key}: {e}")
 
-def delete_cache(key: str):
+async def delete_cache(key: str):
     """Delete data from Redis cache."""
-    if redis_client is None:
-        return
     try:
-        redis_client.delete(key)
+        await _get_client().delete(key)
     except Exception as e:
         logger.error(f"Redis delete error for key {key}: {e}")
+
+# --- Single flight ---
+# On a miss only the caller holding the lock recomputes; the others wait
+# briefly for its result instead of all hitting Postgres at once.
+LOCK_TTL_SECONDS = 5
+LOCK_WAIT_SECONDS = 0.2
+
+async def single_flight(
+    key: str,
+    compute: Callable[[], Awaitable[Any]],
+    poll: Callable[[], Awaitable[Optional[Any]]]
+) -> Any:
+    """
+    Run `compute` in at most one caller per key at a time.
+    Callers that lose the race poll for the winner's result with exponential
+    backoff and compute it themselves once LOCK_WAIT_SECONDS have passed.
+    """
+    lock_key = f"{key}:lock"
+    try:
+        acquired = await _get_client().set(lock_key, 1, nx=True, ex=LOCK_TTL_SECONDS)
+    except Exception as e:
+        logger.error(f"Redis lock error for key {key}: {e}")
+        return await compute()
+
+    if acquired:
+        try:
+            return await compute()
+        finally:
+            await delete_cache(lock_key)
+
+    delay, waited = 0.01, 0.0
+    while waited < LOCK_WAIT_SECONDS:
+        await asyncio.sleep(delay)
+        waited += delay
+        delay = min(delay * 2, LOCK_WAIT_SECONDS - waited)
+        result = await poll()
+        if result is not None:
+            return result
+    return await compute()
+
+# --- Response versions ---
+# Counters bumped whenever the underlying metrics change; the metrics
+# endpoints derive their ETags from them.
+TOP_COURSES_VERSION_KEY = "top_courses:ver"
+
+def course_version_key(course_id: str) -> str:
+    return f"course_ver:{course_id}"
+
+async def get_version(version_key: str) -> Optional[int]:
+    """Current value of a version counter, or None if Redis is unavailable."""
+    try:
+        return int(await _get_client().get(version_key) or 0)
+    except Exception as e:
+        logger.error(f"Redis get error for key {version_key}: {e}")
+        return None
+
+async def get_cache_raw_with_version(key: str, version_key: str) -> Tuple[Optional[bytes], Optional[int]]:
+    """Read a raw cache entry and its version counter atomically."""
+    try:
+        async with _get_client().pipeline(transaction=True) as pipe:
+            pipe.get(key)
+            pipe.get(version_key)
+            data, version = await pipe.execute()
+        return data, int(version or 0)
+    except Exception as e:
+        logger.error(f"Redis get error for key {key}: {e}")
+        return None, None
+
+async def invalidate_cache(key: str, version_key: str):
+    """Drop a cache entry and bump its version counter atomically."""
+    try:
+        async with _get_client().pipeline(transaction=True) as pipe:
+            pipe.delete(key)
+            pipe.incr(version_key)
+            await pipe.execute()
+    except Exception as e:
+        logger.error(f"Redis invalidation error for key {key}: {e}")
+
+# --- Top courses ranking ---
+# Sorted sets maintained incrementally from recorded events. The ready key
+# marks that the sets were backfilled from Postgres and are authoritative.
+TOP_VIEWS_KEY = "top_courses:views"
+TOP_ENROLLMENTS_KEY = "top_courses:enrollments"
+TOP_READY_KEY = "top_courses:ready"
+
+async def ranking_enabled() -> bool:
+    """Whether Redis is reachable, i.e. the ranking is worth backfilling."""
+    try:
+        return bool(await _get_client().ping())
+    except Exception as e:
+        logger.warning(f"Redis unavailable, top courses ranking disabled: {e}")
+        return False
+
+async def increment_top_courses(course_id: str, views: int = 0, enrollments: int = 0):
+    """Increment a course's view/enrollment scores in the ranking sets."""
+    try:
+        async with _get_client().pipeline(transaction=False) as pipe:
+            # Incrementing by 0 still registers the course in both sets
+            pipe.zincrby(TOP_VIEWS_KEY, views, course_id)
+            pipe.zincrby(TOP_ENROLLMENTS_KEY, enrollments, course_id)
+            pipe.incr(TOP_COURSES_VERSION_KEY)
+            await pipe.execute()
+    except Exception as e:
+        logger.error(f"Redis ranking update error for course {course_id}: {e}")
+
+async def get_top_courses_ranking(limit: int) -> Optional[List[Tuple[str, int, int]]]:
+    """
+    Get the top courses by views as (course_id, total_views, total_enrollments).
+    Returns None when the ranking has not been backfilled yet.
+    """
+    try:
+        client = _get_client()
+        if not await client.exists(TOP_READY_KEY):
+            return None
+        ranked = await client.zrevrange(TOP_VIEWS_KEY, 0, limit - 1, withscores=True)
+        if not ranked:
+            return []
+        async with client.pipeline(transaction=False) as pipe:
+            for member, _ in ranked:
+                pipe.zscore(TOP_ENROLLMENTS_KEY, member)
+            enrollments = await pipe.execute()
+        return [
+            (member.decode(), int(views), int(enrolled or 0))
+            for (member, views), enrolled in zip(ranked, enrollments)
+        ]
+    except Exception as e:
+        logger.error(f"Redis ranking read error: {e}")
+        return None
+
+async def backfill_top_courses(rows: List[Tuple[str, int, int]]):
+    """Replace the ranking sets with totals computed from the database."""
+    try:
+        async with _get_client().pipeline(transaction=True) as pipe:
+            pipe.delete(TOP_VIEWS_KEY, TOP_ENROLLMENTS_KEY)
+            if rows:
+                pipe.zadd(TOP_VIEWS_KEY, {course_id: views for course_id, views, _ in rows})
+                pipe.zadd(TOP_ENROLLMENTS_KEY, {course_id: enrolled for course_id, _, enrolled in rows})
+            pipe.set(TOP_READY_KEY, 1)
+            await pipe.execute()
+    except Exception as e:
+        logger.error(f"Redis ranking backfill error: {e}")
@@ -1,16 +1,32 @@
-from sqlalchemy import create_engine
+from functools import lru_cache
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
-from .core.config import settings
+from .core.config import get_settings
 
-engine = create_engine(settings.POSTGRES_URL)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# Sessions are bound to the engine on creation, see get_db().
+# Objects stay usable after commit so handlers never trigger lazy refreshes.
+SessionLocal = async_sessionmaker(autoflush=False, expire_on_commit=False)
 
 Base = declarative_base()
 
-def get_db():
-    db = SessionLocal()
-    try:
+def _async_url(url: str) -> str:
+    """Point a plain postgresql:// URL at the asyncpg driver."""
+    if url.startswith("postgresql://"):
+        return url.replace("postgresql://", "postgresql+asyncpg://", 1)
+    return url
+
+@lru_cache(maxsize=1)
+def get_engine():
+    """Create the engine on first use instead of at import time."""
+    return create_async_engine(
+        _async_url(get_settings().POSTGRES_URL),
+        pool_size=20,
+        max_overflow=40,
+        # Detect connections dropped by Postgres idle timeouts before use
+        pool_pre_ping=True,
+        pool_recycle=1800
+    )
+
+async def get_db():
+    async with SessionLocal(bind=get_engine()) as db:
         yield db
-    finally:
-        db.close()
@@ -1,12 +1,14 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, Depends
+from fastapi.responses import ORJSONResponse
 from sqlalchemy import text
 import logging
+import os
 from .routes import events, metrics
-from .database import engine, Base
+from .database import get_engine, Base
 from .auth import get_current_user
 from .models.analytics import SCHEMA_NAME
 from fastapi.middleware.cors import CORSMiddleware
-from .cors import GranularCORSMiddleware
 from .core.logging_config import setup_logging
 
 # Initialize logging
@@ -14,20 +16,36 @@ setup_logging()
 logger = logging.getLogger(__name__)
 
 # --- DATABASE INITIALIZATION ---
-with engine.connect() as connection:
-    connection.execute(text(f"CREATE SCHEMA IF NOT EXISTS {SCHEMA_NAME}"))
-    connection.commit()
-
-Base.metadata.create_all(bind=engine)
+# The schema is managed by Alembic: the container runs `alembic upgrade head`
+# before starting uvicorn. AUTO_MIGRATE=1 keeps the old create-on-boot
+# behaviour for local runs outside Docker.
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    engine = get_engine()
+    if os.getenv("AUTO_MIGRATE") == "1":
+        async with engine.begin() as connection:
+            await connection.execute(text(f"CREATE SCHEMA IF NOT EXISTS {SCHEMA_NAME}"))
+            await connection.run_sync(Base.metadata.create_all)
+    yield
+    await engine.dispose()
 
 app = FastAPI(
     title="Analytics Service",
     description="Microservice for tracking course views and enrollments",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse
 )
 
-# --- CORS MIDDLEWARES ---
-app.add_middleware(GranularCORSMiddleware)
+# --- CORS MIDDLEWARE ---
+# One permissive policy for the whole app; /events narrows the allowed
+# origin with a router dependency (see routes/events.py).
+app.add_middleware(
+    CORSMiddleware,
+    allow_origins=["*"],
+    allow_methods=["GET", "POST", "OPTIONS"],
+    allow_headers=["*"],
+)
 
 app.include_router(events.router)
 app.include_router(metrics.router)
@@ -1,6 +1,6 @@
 import enum
 import uuid
-from sqlalchemy import Column, Integer, String, Enum, DateTime, Date, UniqueConstraint, text
+from sqlalchemy import Column, Integer, String, Enum, DateTime, Date, UniqueConstraint, Index, text
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.sql import func
 from ..database import Base
@@ -20,7 +20,10 @@ class AnalyticsEvent(Base):
     Stores raw events for every course view or enrollment.
     """
     __tablename__ = "analytics_events"
-    __table_args__ = {"schema": SCHEMA_NAME}
+    __table_args__ = (
+        Index('ix_events_course_created', 'course_id', 'created_at'),
+        {"schema": SCHEMA_NAME}
+    )
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     event_type = Column(Enum(EventType, name="event_type_enum", schema=SCHEMA_NAME), nullable=False)
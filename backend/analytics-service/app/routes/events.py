@@ -1,66 +1,98 @@
-from fastapi import APIRouter, Depends, status
-from sqlalchemy.orm import Session
+import asyncio
+from fastapi import APIRouter, Depends, Header, HTTPException, status
+from typing import Optional
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import bindparam, func, insert
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from datetime import date
 from ..database import get_db
 from ..models.analytics import AnalyticsEvent, CourseDailyMetric, EventType
 from ..schemas.analytics import EventCreate, EventResponse
 from ..auth import get_current_user
-from ..core.redis import delete_cache
+from ..core.redis import course_version_key, increment_top_courses, invalidate_cache
 import logging
 
 logger = logging.getLogger(__name__)
 
-router = APIRouter(prefix="/events", tags=["events"])
+# Events may only be recorded by the course-service; requests without an
+# Origin header (server-to-server calls) are let through.
+EVENTS_ALLOWED_ORIGIN = "http://course-service:8000"
+
+async def restrict_origin(origin: Optional[str] = Header(None)):
+    if origin is not None and origin != EVENTS_ALLOWED_ORIGIN:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Origin not allowed"
+        )
+
+router = APIRouter(prefix="/events", tags=["events"], dependencies=[Depends(restrict_origin)])
+
+# Statements are built once at import; handlers only bind parameters
+_INSERT_EVENT = insert(AnalyticsEvent).returning(AnalyticsEvent.id, AnalyticsEvent.created_at)
+
+def _daily_metric_upsert(views: int, enrollments: int):
+    # A single atomic upsert replaces SELECT + INSERT + UPDATE and cannot
+    # lose increments under concurrent requests.
+    stmt = pg_insert(CourseDailyMetric).values(
+        course_id=bindparam("course_id"),
+        metric_date=bindparam("metric_date"),
+        views_count=views,
+        enrollments_count=enrollments
+    )
+    return stmt.on_conflict_do_update(
+        index_elements=[CourseDailyMetric.course_id, CourseDailyMetric.metric_date],
+        set_={
+            "views_count": CourseDailyMetric.views_count + stmt.excluded.views_count,
+            "enrollments_count": CourseDailyMetric.enrollments_count + stmt.excluded.enrollments_count,
+            "updated_at": func.now(),
+        }
+    )
+
+_VIEW_UPSERT = _daily_metric_upsert(views=1, enrollments=0)
+_ENROLL_UPSERT = _daily_metric_upsert(views=0, enrollments=1)
 
 @router.post("/view", response_model=EventResponse, status_code=status.HTTP_201_CREATED)
-def record_view(event: EventCreate, db: Session = Depends(get_db), current_user: dict = Depends(get_current_user)):
-    return record_event(event, EventType.course_view, db, current_user)
+async def record_view(event: EventCreate, db: AsyncSession = Depends(get_db), current_user: dict = Depends(get_current_user)):
+    return await record_event(event, EventType.course_view, db, current_user)
 
 @router.post("/enroll", response_model=EventResponse, status_code=status.HTTP_201_CREATED)
-def record_enroll(event: EventCreate, db: Session = Depends(get_db), current_user: dict = Depends(get_current_user)):
-    return record_event(event, EventType.course_enroll, db, current_user)
+async def record_enroll(event: EventCreate, db: AsyncSession = Depends(get_db), current_user: dict = Depends(get_current_user)):
+    return await record_event(event, EventType.course_enroll, db, current_user)
 
-def record_event(event_in: EventCreate, event_type: EventType, db: Session, current_user: dict):
+async def record_event(event_in: EventCreate, event_type: EventType, db: AsyncSession, current_user: dict):
     # 1. Record the raw granular event for auditing and deep analysis
-    db_event = AnalyticsEvent(
-        event_type=event_type,
-        user_id=current_user["user_id"],
-        course_id=event_in.course_id,
-        user_role=current_user["role"]
-    )
-    db.add(db_event)
+    # RETURNING gives back the generated columns without a refresh SELECT
+    event_data = {
+        "event_type": event_type,
+        "user_id": current_user["user_id"],
+        "course_id": event_in.course_id,
+        "user_role": current_user["role"],
+    }
+    created = (await db.execute(_INSERT_EVENT, event_data)).one()
     
     # 2. Update the summarized Daily Metrics table (Performance optimization)
-    # This avoids expensive 'COUNT(*)' queries on the raw events table
-    today = date.today()
-    metric = db.query(CourseDailyMetric).filter(
-        CourseDailyMetric.course_id == event_in.course_id,
-        CourseDailyMetric.metric_date == today
-    ).first()
-    
-    # If no metric exists for today, create the day's record (Upsert logic)
-    if not metric:
-        metric = CourseDailyMetric(
-            course_id=event_in.course_id,
-            metric_date=today,
-            views_count=0,
-            enrollments_count=0
-        )
-        db.add(metric)
-    
-    # Increment the specific metric based on event type
-    if event_type == EventType.course_view:
-        metric.views_count += 1
-    elif event_type == EventType.course_enroll:
-        metric.enrollments_count += 1
+    # This avoids expensive 'COUNT(*)' queries on the raw events table.
+    is_view = event_type == EventType.course_view
+    await db.execute(
+        _VIEW_UPSERT if is_view else _ENROLL_UPSERT,
+        {"course_id": event_in.course_id, "metric_date": date.today()}
+    )
         
-    db.commit()
+    await db.commit()
     logger.info(f"Recorded {event_type} for course {event_in.course_id} by user {current_user['user_id']}")
     
-    # Cache Invalidation: Delete relevant analytics keys
-    delete_cache("top_courses")
-    delete_cache(f"course_metrics:{event_in.course_id}")
+    # Keep the top courses ranking current and drop stale per-course metrics
+    await asyncio.gather(
+        increment_top_courses(
+            str(event_in.course_id),
+            views=1 if is_view else 0,
+            enrollments=0 if is_view else 1
+        ),
+        invalidate_cache(
+            f"course_metrics:{event_in.course_id}",
+            course_version_key(str(event_in.course_id))
+        ),
+    )
     logger.info(f"Invalidated cache for course {event_in.course_id}")
     
-    db.refresh(db_event)
-    return db_event
+    return {**event_data, "id": created.id, "created_at": created.created_at}
@@ -1,69 +1,135 @@
-from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
-from sqlalchemy import func
-from typing import List
+from fastapi import APIRouter, Depends, Request, Response, status
+from pydantic import TypeAdapter
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import func, select
+from typing import List, Optional, Tuple
 from uuid import UUID
 from ..database import get_db
 from ..models.analytics import CourseDailyMetric
 from ..schemas.analytics import DailyMetricResponse, TopCourseResponse
 from ..auth import get_current_user
-from ..core.redis import get_cache, set_cache
-from pydantic import TypeAdapter
-import json
+from ..core.redis import (
+    set_cache, get_cache_raw, get_cache_raw_with_version, get_version, course_version_key, single_flight,
+    TOP_COURSES_VERSION_KEY, TOP_READY_KEY, get_top_courses_ranking, backfill_top_courses, ranking_enabled
+)
 import logging
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/metrics", tags=["metrics"])
 
-@router.get("/course/{course_id}", response_model=List[DailyMetricResponse])
-def get_course_metrics(course_id: UUID, db: Session = Depends(get_db), current_user: dict = Depends(get_current_user)):
+_daily_metrics_adapter = TypeAdapter(List[DailyMetricResponse])
+
+# Metrics are slow-moving aggregates; clients may reuse them briefly and
+# revalidate with the ETag afterwards. Private: the endpoints require a JWT,
+# so shared proxies must not store them.
+METRICS_CACHE_CONTROL = "private, max-age=30"
+
+def _etag(tag: str, version: Optional[int]) -> Optional[str]:
+    # Without a version (Redis down) the response cannot be revalidated
+    return f'W/"{tag}:{version}"' if version is not None else None
+
+def _not_modified(request: Request, etag: Optional[str]) -> bool:
+    if etag is None:
+        return False
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return False
+    return if_none_match.strip() == "*" or etag in (t.strip() for t in if_none_match.split(","))
+
+def _set_cache_headers(response: Response, etag: Optional[str]):
+    response.headers["Cache-Control"] = METRICS_CACHE_CONTROL
+    if etag is not None:
+        response.headers["ETag"] = etag
+
+@router.get(
+    "/course/{course_id}",
+    response_model=None,
+    responses={200: {"model": List[DailyMetricResponse]}}
+)
+async def get_course_metrics(course_id: UUID, request: Request, db: AsyncSession = Depends(get_db), current_user: dict = Depends(get_current_user)):
+    # The cache holds the final JSON body, so hits skip validation and encoding
     cache_key = f"course_metrics:{course_id}"
-    cached_data = get_cache(cache_key)
-    if cached_data:
+    cached_body, version = await get_cache_raw_with_version(cache_key, course_version_key(str(course_id)))
+    etag = _etag(str(course_id), version)
+    if _not_modified(request, etag):
+        response = Response(status_code=status.HTTP_304_NOT_MODIFIED)
+        _set_cache_headers(response, etag)
+        return response
+
+    if cached_body is not None:
         logger.info(f"Cache hit for {cache_key}")
-        return cached_data
+        response = Response(content=cached_body, media_type="application/json")
+        _set_cache_headers(response, etag)
+        return response
 
     logger.info(f"Cache miss for {cache_key}, fetching from database")
 
-    metrics = db.query(CourseDailyMetric).filter(
-        CourseDailyMetric.course_id == course_id
-    ).order_by(CourseDailyMetric.metric_date.desc()).all()
-    
-    # Serialize for cache
-    adapter = TypeAdapter(List[DailyMetricResponse])
-    set_cache(cache_key, adapter.dump_python(metrics, mode='json'))
-    
-    return metrics
+    async def load_metrics() -> bytes:
+        result = await db.execute(
+            select(CourseDailyMetric)
+            .where(CourseDailyMetric.course_id == course_id)
+            .order_by(CourseDailyMetric.metric_date.desc())
+        )
+        metrics = result.scalars().all()
+
+        body = _daily_metrics_adapter.dump_json(
+            _daily_metrics_adapter.validate_python(metrics, from_attributes=True)
+        )
+        await set_cache(cache_key, body)
+        return body
+
+    body = await single_flight(cache_key, load_metrics, poll=lambda: get_cache_raw(cache_key))
+
+    response = Response(content=body, media_type="application/json")
+    _set_cache_headers(response, etag)
+    return response
 
 @router.get("/top-courses", response_model=List[TopCourseResponse])
-def get_top_courses(limit: int = 10, db: Session = Depends(get_db), current_user: dict = Depends(get_current_user)):
-    cache_key = "top_courses"
-    cached_data = get_cache(cache_key)
-    if cached_data:
-        logger.info(f"Cache hit for {cache_key}")
-        return cached_data[:limit]
+async def get_top_courses(request: Request, response: Response, limit: int = 10, db: AsyncSession = Depends(get_db), current_user: dict = Depends(get_current_user)):
+    etag = _etag(f"top:{limit}", await get_version(TOP_COURSES_VERSION_KEY))
+    if _not_modified(request, etag):
+        not_modified = Response(status_code=status.HTTP_304_NOT_MODIFIED)
+        _set_cache_headers(not_modified, etag)
+        return not_modified
+    _set_cache_headers(response, etag)
 
-    logger.info(f"Cache miss for {cache_key}, fetching from database")
+    ranking = await get_top_courses_ranking(limit)
+    if ranking is not None:
+        logger.info("Serving top courses from Redis ranking")
+    else:
+        logger.info("Top courses ranking is cold, fetching from database")
+        ranking = await _load_top_courses(limit, db)
+
+    return [
+        {
+            "course_id": course_id,
+            "total_views": total_views,
+            "total_enrollments": total_enrollments,
+        } for course_id, total_views, total_enrollments in ranking
+    ]
 
-    top_courses = db.query(
+async def _load_top_courses(limit: int, db: AsyncSession) -> List[Tuple[str, int, int]]:
+    query = select(
         CourseDailyMetric.course_id,
         func.sum(CourseDailyMetric.views_count).label("total_views"),
         func.sum(CourseDailyMetric.enrollments_count).label("total_enrollments")
     ).group_by(CourseDailyMetric.course_id).order_by(
         func.sum(CourseDailyMetric.views_count).desc()
-    ).limit(limit).all()
-    
-    result = [
-        TopCourseResponse(
-            course_id=row.course_id,
-            total_views=row.total_views,
-            total_enrollments=row.total_enrollments
-        ) for row in top_courses
-    ]
-    
-    # Serialize for cache
-    adapter = TypeAdapter(List[TopCourseResponse])
-    set_cache(cache_key, adapter.dump_python(result, mode='json'))
-    
-    return result
+    )
+
+    if not await ranking_enabled():
+        rows = (await db.execute(query.limit(limit))).all()
+        return [(str(row.course_id), row.total_views, row.total_enrollments) for row in rows]
+
+    async def backfill() -> List[Tuple[str, int, int]]:
+        # Aggregate every course once to backfill the ranking, then slice
+        rows = [
+            (str(row.course_id), row.total_views, row.total_enrollments)
+            for row in (await db.execute(query)).all()
+        ]
+        await backfill_top_courses(rows)
+        return rows[:limit]
+
+    # Concurrent cold requests wait for a single backfill
+    return await single_flight(TOP_READY_KEY, backfill, poll=lambda: get_top_courses_ranking(limit))
@@ -0,0 +1,46 @@
+"""Full-text search vector and catalog filter index on courses
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-15 00:00:00
+
+The base tables are still created by the service on startup
+(create_tables), so this revision only adds what create_all cannot add
+to an existing table. IF NOT EXISTS keeps it a no-op on databases that
+create_all built from the current models.
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+from app.models.course import SEARCH_VECTOR_EXPRESSION
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0001"
+down_revision: Union[str, Sequence[str], None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute(
+        "ALTER TABLE courses ADD COLUMN IF NOT EXISTS search_vector tsvector "
+        f"GENERATED ALWAYS AS ({SEARCH_VECTOR_EXPRESSION}) STORED"
+    )
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS courses_search_idx ON courses USING gin (search_vector)"
+    )
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS courses_published_category_level_idx "
+        "ON courses (published, category, level)"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DROP INDEX IF EXISTS courses_published_category_level_idx")
+    op.execute("DROP INDEX IF EXISTS courses_search_idx")
+    op.execute("ALTER TABLE courses DROP COLUMN IF EXISTS search_vector")
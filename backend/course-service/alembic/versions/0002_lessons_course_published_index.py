@@ -0,0 +1,30 @@
+"""Composite (course_id, is_published) index on lessons
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-15 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0002"
+down_revision: Union[str, Sequence[str], None] = "0001"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS lessons_course_id_is_published_idx "
+        "ON lessons (course_id, is_published)"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DROP INDEX IF EXISTS lessons_course_id_is_published_idx")
@@ -0,0 +1,30 @@
+"""(created_at, id) index on courses for keyset pagination
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-15 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0003"
+down_revision: Union[str, Sequence[str], None] = "0002"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS courses_created_at_id_idx "
+        "ON courses (created_at, id)"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DROP INDEX IF EXISTS courses_created_at_id_idx")
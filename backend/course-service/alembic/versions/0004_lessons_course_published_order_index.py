@@ -0,0 +1,41 @@
+"""(course_id, is_published, order_index, created_at) index on lessons
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-15 00:00:00
+
+Replaces lessons_course_id_is_published_idx: the new index has the same
+leading columns, so it still serves the published lesson counts, and it
+also hands out lesson pages already in display order. Both statements run
+CONCURRENTLY (outside the migration transaction) so lessons stay writable.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0004"
+down_revision: Union[str, Sequence[str], None] = "0003"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.get_context().autocommit_block():
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS lessons_course_published_order_idx "
+            "ON lessons (course_id, is_published, order_index, created_at)"
+        )
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS lessons_course_id_is_published_idx")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS lessons_course_id_is_published_idx "
+            "ON lessons (course_id, is_published)"
+        )
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS lessons_course_published_order_idx")
@@ -0,0 +1,47 @@
+"""(published, ...) and (instructor_id, ...) newest-first indexes on courses
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-15 00:00:00
+
+The catalog and instructor listings filter on published / instructor_id and
+sort by (created_at, id); these indexes return those pages in order without
+a sort. The instructor index replaces ix_courses_instructor_id, which is its
+prefix. All statements run CONCURRENTLY (outside the migration transaction)
+so courses stay writable.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0005"
+down_revision: Union[str, Sequence[str], None] = "0004"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.get_context().autocommit_block():
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS courses_published_created_at_id_idx "
+            "ON courses (published, created_at, id)"
+        )
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS courses_instructor_created_at_id_idx "
+            "ON courses (instructor_id, created_at, id)"
+        )
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_courses_instructor_id")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_courses_instructor_id "
+            "ON courses (instructor_id)"
+        )
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS courses_instructor_created_at_id_idx")
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS courses_published_created_at_id_idx")
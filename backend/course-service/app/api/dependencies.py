@@ -1,13 +1,4 @@
-
-from typing import Generator
-from fastapi import Depends
-from sqlalchemy.orm import Session
 from ..database import get_db
 
-# Database dependency
-def get_database() -> Generator:
-    db = next(get_db())
-    try:
-        yield db
-    finally:
-        db.close()
\ No newline at end of file
+# Database dependency; get_db already closes the session when the request ends
+get_database = get_db
@@ -1,20 +1,95 @@
-from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, status, Query, Path, Form, File, UploadFile
-from sqlalchemy.orm import Session
+from typing import List, Optional, Tuple
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, status, Query, Path, Form, File, UploadFile, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.orm import Session, raiseload
+from datetime import datetime
+import asyncio
+import base64
+import hashlib
+import logging
+import time
 import uuid
 
 from ...database import get_db
 from ...crud import course as crud_course
 from ...crud import lesson as crud_lesson
 from ...schemas.course import (
-    CourseBase, CourseUpdateForm, CourseResponse, 
-    CourseListResponse, CourseLevel, CourseCreateForm, CourseUpdateResponse
+    CourseUpdateForm, CourseResponse, 
+    CourseListResponse, CourseLevel, CourseCreateForm, CourseUpdateResponse,
+    CourseFilters, ThumbnailPresignRequest, ThumbnailPresignResponse, ThumbnailConfirm
 )
-from ...core.auth import get_current_user, get_current_instructor, get_current_user_optional
-from ...core.minio_client import minio_client
+from ...core.auth import get_current_instructor, get_current_user_optional
+from ...core.minio_client import minio_client, PRESIGNED_UPLOAD_EXPIRY
+from ...core.etag import etag_matches
+from ...core.pagination import page_fields
+from ...core.config import get_settings
+from ...core.redis import get_cache, set_cache, get_version, bump_version, bump_versions
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+# CourseResponse only reads column attributes. In debug, any relationship
+# lazy load from the read endpoints raises instead of silently adding N+1 queries.
+COURSE_READ_OPTIONS = (raiseload("*"),) if get_settings().debug else ()
+
+# Public catalog listings are cached briefly; writes to any course bump the
+# version embedded in the keys, invalidating every cached page at once.
+COURSES_VERSION_KEY = "courses:version"
+COURSE_LIST_CACHE_TTL_SECONDS = 30
+
+# Published course details are cached longer, under a per-course version
+# bumped on every write to that course. The version is read before the row,
+# so a body loaded before a write is stored under the old, unreachable key.
+COURSE_CACHE_TTL_SECONDS = 300
+
+# Background file cleanup retries failed keys with exponential backoff
+FILE_DELETE_RETRIES = 3
+FILE_DELETE_BACKOFF_SECONDS = 0.5
+
+def _course_version_key(course_id: uuid.UUID) -> str:
+    return f"courses:version:{course_id}"
+
+def _invalidate_course(course_id: uuid.UUID):
+    bump_versions(_course_version_key(course_id), COURSES_VERSION_KEY)
+
+def _course_list_cache_key(
+    version: int, filters: CourseFilters, skip: int, limit: int, include_total: bool, cursor: Optional[str]
+) -> str:
+    digest = hashlib.blake2b(
+        repr((filters, skip, limit, include_total, cursor)).encode(), digest_size=16
+    ).hexdigest()
+    return f"courses:list:{version}:{digest}"
+
+# Keyset cursors are the (created_at, id) of the last course on a page
+def _encode_cursor(db_course) -> str:
+    raw = f"{db_course.created_at.isoformat()}|{db_course.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+def _decode_cursor(cursor: str) -> Tuple[datetime, uuid.UUID]:
+    try:
+        created_at, course_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+        return datetime.fromisoformat(created_at), uuid.UUID(course_id)
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
+
+def _delete_course_files(course_id: uuid.UUID, object_names: List[str]):
+    """Remove a deleted course's files from MinIO, retrying failed keys"""
+    failed = minio_client.delete_files(object_names)
+    # Back off between attempts so bursts of deletes ride out MinIO throttling
+    for attempt in range(FILE_DELETE_RETRIES):
+        if not failed:
+            return
+        time.sleep(FILE_DELETE_BACKOFF_SECONDS * 2 ** attempt)
+        failed = minio_client.delete_files(failed)
+    
+    # Log errors but don't fail anything (course is already deleted)
+    for object_name in failed:
+        logger.warning(f"Failed to delete file {object_name} for deleted course {course_id}")
+
 ##### Should be without signin ###################
 ##### Student can only get published ones ########
 # List + Get one: For every one (students + public: only published)
@@ -32,66 +107,94 @@ def get_courses(
     is_featured: Optional[bool] = Query(None),
     search: Optional[str] = Query(None),
     instructor_id: Optional[str] = Query(None),
+    include_total: bool = Query(True),
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page; replaces skip"),
     current_user: Optional[dict] = Depends(get_current_user_optional),
 ):
     """
     Get all courses with optional filtering.
     
+    Pages can be walked with `cursor` (keyset pagination, constant cost at
+    any depth); `skip` is kept for existing clients.
+    With include_total=false no count is computed: total is skip plus the
+    page length and pages is 0 (enough for infinite scroll).
+    
     Access control:
     - Current instructor: sees all their own courses (published + unpublished) 
                          + all published courses from other instructors
     - Other users (students, other instructors, guests): see only published courses
     """
-    filters = {}
-    if category:
-        filters["category"] = category
-    if level:
-        filters["level"] = level
-    if is_featured is not None:
-        filters["is_featured"] = is_featured
-    if search:
-        filters["search"] = search
-    
     # Role-based visibility logic
     if current_user and current_user.get("role") == "instructor":
         # Current instructor sees:
         # 1. All their own courses (published and unpublished)
         # 2. All published courses from other instructors
-        
-        # If instructor_id filter is explicitly provided, use it
+        # An explicit instructor_id filter replaces that scope; the published
+        # filter is honored either way
         if instructor_id:
-            filters["instructor_id"] = instructor_id
-            # Honor published filter if provided
-            if published is not None:
-                filters["published"] = published
+            scope = {"instructor_id": instructor_id, "published": published}
         else:
-            # No instructor_id filter: get own courses + published courses from others
-            # This requires special handling in the CRUD layer
-            filters["current_instructor_id"] = current_user["user_id"]
-            # Honor published filter if provided (applies to all courses)
-            if published is not None:
-                filters["published"] = published
+            # Own courses + published courses from others (handled in the CRUD layer)
+            scope = {"current_instructor_id": current_user["user_id"], "published": published}
     else:
         # Students, other instructors (not current), and guests can only see published courses
-        filters["published"] = True
-        # Honor instructor_id filter if provided
-        if instructor_id:
-            filters["instructor_id"] = instructor_id
+        scope = {"instructor_id": instructor_id or None, "published": True}
     
-    courses = crud_course.course.get_multi(
-        db, skip=skip, limit=limit, filters=filters
+    filters = CourseFilters(
+        category=category or None,
+        level=level,
+        is_featured=is_featured,
+        search=search or None,
+        **scope
     )
-    total = crud_course.course.count(db, filters=filters)
     
-    return CourseListResponse(
+    after = _decode_cursor(cursor) if cursor else None
+    if after is not None:
+        skip = 0
+    
+    # Instructors get a personalized view; everyone else shares the cache
+    cache_key = None
+    if not (current_user and current_user.get("role") == "instructor"):
+        version = get_version(COURSES_VERSION_KEY)
+        if version is not None:
+            cache_key = _course_list_cache_key(version, filters, skip, limit, include_total, cursor)
+            cached_body = get_cache(cache_key)
+            if cached_body is not None:
+                return Response(content=cached_body, media_type="application/json")
+    
+    if after is not None:
+        # One extra row tells whether another page follows
+        courses = crud_course.course.get_multi(
+            db, limit=limit + 1, filters=filters, options=COURSE_READ_OPTIONS, after=after
+        )
+        has_more = len(courses) > limit
+        courses = courses[:limit]
+        total = crud_course.course.total(db, filters=filters) if include_total else len(courses)
+    elif include_total:
+        courses, total = crud_course.course.get_multi_with_total(
+            db, skip=skip, limit=limit, filters=filters, options=COURSE_READ_OPTIONS
+        )
+        has_more = skip + len(courses) < total
+    else:
+        courses = crud_course.course.get_multi(
+            db, skip=skip, limit=limit, filters=filters, options=COURSE_READ_OPTIONS
+        )
+        has_more = len(courses) == limit
+        total = skip + len(courses)
+    
+    response = CourseListResponse(
         items=courses,
-        total=total,
-        page=skip // limit + 1,
-        size=limit,
-        pages=(total + limit - 1) // limit
+        **page_fields(total, skip, limit, count_pages=include_total),
+        next_cursor=_encode_cursor(courses[-1]) if has_more else None
     )
+    if cache_key is None:
+        return response
+    
+    body = response.model_dump_json().encode()
+    set_cache(cache_key, body, ttl=COURSE_LIST_CACHE_TTL_SECONDS)
+    return Response(content=body, media_type="application/json")
 
-@router.get("/{course_id}", response_model=CourseResponse)
+@router.get("/{course_id:uuid}", response_model=CourseResponse)
 def get_course(
     course_id: uuid.UUID = Path(...),
     db: Session = Depends(get_db),
@@ -100,7 +203,16 @@ def get_course(
     """
     Get course by ID
     """
-    db_course = crud_course.course.get(db, course_id=course_id)
+    # Only published courses are cached, and those are visible to everyone
+    cache_key = None
+    version = get_version(_course_version_key(course_id))
+    if version is not None:
+        cache_key = f"courses:detail:{course_id}:{version}"
+        cached_body = get_cache(cache_key)
+        if cached_body is not None:
+            return Response(content=cached_body, media_type="application/json")
+    
+    db_course = crud_course.course.get(db, course_id=course_id, options=COURSE_READ_OPTIONS)
     if not db_course:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -116,7 +228,13 @@ def get_course(
             detail="Course not found"
         )
     
-    return db_course
+    if not db_course.published:
+        return db_course
+    
+    body = CourseResponse.model_validate(db_course).model_dump_json().encode()
+    if cache_key is not None:
+        set_cache(cache_key, body, ttl=COURSE_CACHE_TTL_SECONDS)
+    return Response(content=body, media_type="application/json")
 
 @router.post("/", response_model=CourseResponse, status_code=status.HTTP_201_CREATED)
 async def create_course(
@@ -149,6 +267,19 @@ async def create_course(
     - **is_featured**: Whether course is featured on homepage
     - **thumbnail_file**: Thumbnail image file (jpg, png, gif, webp, svg - max 5MB)
     """
+    has_thumbnail = bool(thumbnail_file and thumbnail_file.filename)
+    if has_thumbnail:
+        minio_client.validate_thumbnail(thumbnail_file)
+    
+    # The ID and thumbnail object name are picked up front, so the INSERT
+    # and the upload can run side by side. The row only gets its
+    # thumbnail_url once the object exists, so readers never see a URL to
+    # a missing file.
+    course_id = uuid.uuid4()
+    object_name = None
+    if has_thumbnail:
+        object_name = minio_client.new_thumbnail_object_name(str(course_id), thumbnail_file.filename)
+    
     try:
         # Create CourseCreateForm object for validation
         course_form = CourseCreateForm(
@@ -164,23 +295,55 @@ async def create_course(
             is_featured=is_featured
         )
         
-        # Create course in database (without thumbnail)
-        db_course = crud_course.course.create_from_form(
-            db, obj_in=course_form, instructor_id=current_user["user_id"]
-        )
+        # INSERT and thumbnail upload run side by side in the threadpool
+        tasks = [run_in_threadpool(
+            crud_course.course.create_from_form,
+            db,
+            obj_in=course_form,
+            instructor_id=current_user["user_id"],
+            course_id=course_id
+        )]
+        if has_thumbnail:
+            thumbnail_file.file.seek(0)
+            tasks.append(run_in_threadpool(
+                minio_client.put_course_thumbnail,
+                thumbnail_file.file,
+                str(course_id),
+                length=thumbnail_file.size if thumbnail_file.size is not None else -1,
+                filename=thumbnail_file.filename,
+                content_type=thumbnail_file.content_type,
+                object_name=object_name
+            ))
+        results = await asyncio.gather(*tasks, return_exceptions=True)
         
-        # Upload thumbnail if provided
-        thumbnail_url = None
-        if thumbnail_file and thumbnail_file.filename:
-            thumbnail_url, _ = await minio_client.upload_course_thumbnail(
-                thumbnail_file, str(db_course.id)
-            )
-            
-            # Update course with thumbnail URL
-            db_course = crud_course.course.update_thumbnail(
-                db, course_id=db_course.id, thumbnail_url=thumbnail_url
-            )
+        # Undo whichever side succeeded if the other one failed
+        errors = [result for result in results if isinstance(result, Exception)]
+        if errors:
+            if not isinstance(results[0], Exception):
+                await run_in_threadpool(crud_course.course.delete, db, course_id=course_id)
+            if has_thumbnail and not isinstance(results[1], Exception):
+                await run_in_threadpool(minio_client.delete_file, object_name)
+            raise errors[0]
         
+        db_course = results[0]
+        if has_thumbnail:
+            try:
+                updated = await run_in_threadpool(
+                    crud_course.course.update_owned,
+                    db,
+                    course_id=course_id,
+                    instructor_id=current_user["user_id"],
+                    values={"thumbnail_url": results[1]}
+                )
+            except Exception:
+                await run_in_threadpool(db.rollback)
+                await run_in_threadpool(crud_course.course.delete, db, course_id=course_id)
+                await run_in_threadpool(minio_client.delete_file, object_name)
+                raise
+            if updated is not None:
+                db_course = updated[0]
+        
+        await run_in_threadpool(bump_version, COURSES_VERSION_KEY)
         return db_course
         
     except ValueError as e:
@@ -189,16 +352,13 @@ async def create_course(
             detail=str(e)
         )
     except Exception as e:
-        # Rollback course creation if thumbnail upload fails
-        if 'db_course' in locals():
-            crud_course.course.delete(db, course_id=db_course.id)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Course creation failed: {str(e)}"
         )
 
-@router.put("/{course_id}", response_model=CourseUpdateResponse)
-async def update_course(
+@router.put("/{course_id:uuid}", response_model=CourseUpdateResponse)
+def update_course(
     course_id: uuid.UUID = Path(..., description="Course ID to update"),
     title: Optional[str] = Form(None, min_length=1, max_length=255),
     description: Optional[str] = Form(None),
@@ -222,81 +382,71 @@ async def update_course(
     - Returns updated course with thumbnail_updated flag
     """
     try:
-        # Check if course exists
-        db_course = crud_course.course.get(db, course_id=course_id)
-        if not db_course:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Course not found"
-            )
+        thumbnail_updated = False
         
-        # Check ownership
-        if db_course.instructor_id != current_user["user_id"]:
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="Not authorized to update this course"
-            )
+        # Prepare update data for other fields (only those provided)
+        candidates = {
+            "title": title,
+            "description": description,
+            "short_description": short_description,
+            "price": price,
+            "category": category,
+            "subcategory": subcategory,
+            "level": level,
+            "duration_hours": duration_hours,
+            "published": published,
+            "is_featured": is_featured,
+        }
+        update_data = {field: value for field, value in candidates.items() if value is not None}
         
-        thumbnail_updated = False
-        old_thumbnail_url = db_course.thumbnail_url
+        # Validate the form fields before anything is uploaded
+        if update_data:
+            update_data = CourseUpdateForm(**update_data).model_dump(exclude_unset=True)
         
-        # Handle new thumbnail upload
+        # Handle new thumbnail upload; the old one is removed once the
+        # course row points at the new one
         if thumbnail_file and thumbnail_file.filename:
-            # Validate and upload new thumbnail (handles old file deletion internally)
-            new_thumbnail_url, _ = await minio_client.upload_course_thumbnail(
-                thumbnail_file, 
+            minio_client.validate_thumbnail(thumbnail_file)
+            # Nothing is written under the course's prefix unless it is ours
+            _check_course_owner(db, course_id, current_user["user_id"])
+            thumbnail_file.file.seek(0)
+            new_thumbnail_url = minio_client.put_course_thumbnail(
+                thumbnail_file.file,
                 str(course_id),
-                delete_old=True,
-                old_thumbnail_url=db_course.thumbnail_url
+                length=thumbnail_file.size if thumbnail_file.size is not None else -1,
+                filename=thumbnail_file.filename,
+                content_type=thumbnail_file.content_type
             )
             
-            # Update database with new thumbnail URL
-            db_course.thumbnail_url = new_thumbnail_url
+            update_data["thumbnail_url"] = new_thumbnail_url
             thumbnail_updated = True
         
-        # Prepare update data for other fields
-        update_data = {}
-        if title is not None:
-            update_data["title"] = title
-        if description is not None:
-            update_data["description"] = description
-        if short_description is not None:
-            update_data["short_description"] = short_description
-        if price is not None:
-            update_data["price"] = price
-        if category is not None:
-            update_data["category"] = category
-        if subcategory is not None:
-            update_data["subcategory"] = subcategory
-        if level is not None:
-            update_data["level"] = level
-        if duration_hours is not None:
-            update_data["duration_hours"] = duration_hours
-        if published is not None:
-            update_data["published"] = published
-        if is_featured is not None:
-            update_data["is_featured"] = is_featured
-        
-        # Update other course fields if any were provided
+        # Ownership check, fields and thumbnail URL in a single UPDATE ... RETURNING
         if update_data:
-            # Create update object
-            course_update = CourseUpdateForm(**update_data)
-            
-            # Use existing CRUD update method (only for database fields)
-            db_course = crud_course.course.update(
-                db, db_obj=db_course, obj_in=course_update
+            updated = crud_course.course.update_owned(
+                db, course_id=course_id, instructor_id=current_user["user_id"], values=update_data
             )
         else:
-            # If only thumbnail was updated, we still need to commit the change
+            db_course = crud_course.course.get(db, course_id=course_id)
+            owned = db_course is not None and db_course.instructor_id == current_user["user_id"]
+            updated = (db_course, db_course.thumbnail_url) if owned else None
+        
+        if updated is None:
             if thumbnail_updated:
-                db.add(db_course)
-                db.commit()
-                db.refresh(db_course)
+                minio_client.delete_file(minio_client.extract_object_name(new_thumbnail_url))
+            _raise_not_owned(db, course_id)
+        db_course, old_thumbnail_url = updated
+        
+        if thumbnail_updated and old_thumbnail_url:
+            old_object_name = minio_client.extract_object_name(old_thumbnail_url)
+            if old_object_name:
+                minio_client.delete_file(old_object_name)
         
         # Convert to response model
-        response_data = CourseUpdateResponse.from_orm(db_course)
+        response_data = CourseUpdateResponse.model_validate(db_course)
         response_data.thumbnail_updated = thumbnail_updated
         
+        _invalidate_course(course_id)
         return response_data
         
     except ValueError as e:
@@ -315,8 +465,83 @@ async def update_course(
         
 
 
-@router.delete("/{course_id}", status_code=status.HTTP_204_NO_CONTENT)
+##### Presigned thumbnail upload ##################
+# 1. POST /{course_id}/thumbnail-presign -> {url, object_key}
+# 2. Client PUTs the image bytes straight to `url` (with its Content-Type)
+# 3. PATCH /{course_id}/thumbnail {object_key} attaches it to the course
+# The image never passes through this service.
+##################################################
+def _raise_not_owned(db: Session, course_id: uuid.UUID, action: str = "update"):
+    # An owned-row UPDATE/DELETE matched nothing; tell a missing course apart
+    # from someone else's through the meta cache
+    if crud_course.course.get_meta(db, course_id=course_id) is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Course not found"
+        )
+    raise HTTPException(
+        status_code=status.HTTP_403_FORBIDDEN,
+        detail=f"Not authorized to {action} this course"
+    )
+
+def _check_course_owner(db: Session, course_id: uuid.UUID, user_id: str):
+    # Served from the meta cache, so repeat checks skip the database
+    course_meta = crud_course.course.get_meta(db, course_id=course_id)
+    if course_meta is None or course_meta.instructor_id != user_id:
+        _raise_not_owned(db, course_id)
+
+@router.post("/{course_id:uuid}/thumbnail-presign", response_model=ThumbnailPresignResponse)
+def presign_thumbnail_upload(
+    presign_in: ThumbnailPresignRequest,
+    course_id: uuid.UUID = Path(...),
+    current_user: dict = Depends(get_current_instructor),
+    db: Session = Depends(get_db),
+):
+    """
+    Get a presigned URL to upload a course thumbnail directly to storage
+    """
+    _check_course_owner(db, course_id, current_user["user_id"])
+    url, object_key = minio_client.presign_thumbnail_upload(str(course_id), presign_in.filename)
+    return ThumbnailPresignResponse(
+        url=url,
+        object_key=object_key,
+        expires_in=int(PRESIGNED_UPLOAD_EXPIRY.total_seconds())
+    )
+
+@router.patch("/{course_id:uuid}/thumbnail", response_model=CourseResponse)
+def confirm_thumbnail_upload(
+    confirm_in: ThumbnailConfirm,
+    course_id: uuid.UUID = Path(...),
+    current_user: dict = Depends(get_current_instructor),
+    db: Session = Depends(get_db),
+):
+    """
+    Attach a thumbnail uploaded through a presigned URL to the course
+    """
+    _check_course_owner(db, course_id, current_user["user_id"])
+    minio_client.verify_thumbnail_upload(str(course_id), confirm_in.object_key)
+    
+    updated = crud_course.course.update_owned(
+        db, course_id=course_id, instructor_id=current_user["user_id"],
+        values={"thumbnail_url": minio_client.get_object_url(confirm_in.object_key)}
+    )
+    if updated is None:
+        _raise_not_owned(db, course_id)
+    db_course, old_thumbnail_url = updated
+    
+    old_object_name = (
+        minio_client.extract_object_name(old_thumbnail_url)
+        if old_thumbnail_url else ""
+    )
+    if old_object_name and old_object_name != confirm_in.object_key:
+        minio_client.delete_file(old_object_name)
+    
+    _invalidate_course(course_id)
+    return db_course
+
+@router.delete("/{course_id:uuid}", status_code=status.HTTP_204_NO_CONTENT)
 def delete_course(
+    background_tasks: BackgroundTasks,
     course_id: uuid.UUID = Path(...),
     current_user: dict = Depends(get_current_instructor),
     db: Session = Depends(get_db),
@@ -329,66 +554,55 @@ def delete_course(
     - Delete all associated lesson content files from MinIO storage
     - Delete the course thumbnail from MinIO storage
     """
-    db_course = crud_course.course.get(db, course_id=course_id)
-    if not db_course:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Course not found"
-        )
-    
-    # Check ownership
-    if db_course.instructor_id != current_user["user_id"]:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Not authorized to delete this course"
-        )
-    
-    # Capture thumbnail URL before deletion
-    thumbnail_url = db_course.thumbnail_url
+    # Get the content files of all lessons (published and unpublished)
+    # before the cascade removes them
+    file_urls = crud_lesson.lesson.get_content_urls(db, course_id=course_id)
     
-    # Get all lessons for this course (published and unpublished)
-    course_lessons = crud_lesson.lesson.get_by_course(
-        db, course_id=course_id, published_only=False
+    # Ownership check and delete in one statement
+    deleted = crud_course.course.delete_owned(
+        db, course_id=course_id, instructor_id=current_user["user_id"]
     )
+    if deleted is None:
+        _raise_not_owned(db, course_id, action="delete")
+    _invalidate_course(course_id)
     
-    # Delete course from database first
-    crud_course.course.delete(db, course_id=course_id)
-    
-    # Delete all lesson content files from MinIO
-    for lesson in course_lessons:
-        if lesson.content_url:
-            try:
-                object_name = minio_client.extract_object_name(lesson.content_url)
-                if object_name:
-                    minio_client.delete_file(object_name)
-            except Exception as e:
-                # Log error but don't fail the request (course is already deleted)
-                print(f"Warning: Failed to delete lesson content for lesson {lesson.id}: {e}")
-    
-    # Delete course thumbnail from MinIO if it exists
-    if thumbnail_url:
-        try:
-            object_name = minio_client.extract_object_name(thumbnail_url)
-            if object_name:
-                minio_client.delete_file(object_name)
-        except Exception as e:
-            # Log error but don't fail the request (course is already deleted)
-            print(f"Warning: Failed to delete thumbnail for deleted course: {e}")
+    # Delete all lesson content files and the thumbnail from MinIO in bulk
+    if deleted.thumbnail_url:
+        file_urls.append(deleted.thumbnail_url)
+    object_names = [
+        object_name for object_name in map(minio_client.extract_object_name, file_urls)
+        if object_name
+    ]
+    # One remove_objects batch, run after the 204 has been sent
+    if object_names:
+        background_tasks.add_task(_delete_course_files, course_id, object_names)
     
     return None
 
 @router.get("/instructor/mine", response_model=List[CourseResponse])
 def get_my_courses(
+    request: Request,
+    response: Response,
     current_user: dict = Depends(get_current_instructor),
     db: Session = Depends(get_db),
     published: Optional[bool] = Query(None),
 ):
     """
     Get courses created by the current instructor
+    
+    Dashboards poll this endpoint: the ETag changes whenever one of the
+    courses is created, updated or deleted, and a matching If-None-Match
+    gets a 304 without loading the courses.
     """
-    filters = {"instructor_id": current_user["user_id"]}
-    if published is not None:
-        filters["published"] = published
+    filters = CourseFilters(instructor_id=current_user["user_id"], published=published)
+    
+    max_updated_at, total = crud_course.course.get_fingerprint(db, filters=filters)
+    etag = '"{}"'.format(hashlib.blake2b(
+        f"{max_updated_at}:{total}:{published}".encode(), digest_size=16
+    ).hexdigest())
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+    response.headers["ETag"] = etag
     
-    courses = crud_course.course.get_multi(db, filters=filters)
+    courses = crud_course.course.get_multi(db, filters=filters, options=COURSE_READ_OPTIONS)
     return courses
\ No newline at end of file
@@ -1,20 +1,24 @@
 from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, status, Query, Path
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Path, Response
+from pydantic import TypeAdapter
 from sqlalchemy.orm import Session
 import uuid
 
 from ...database import get_db
 from ...crud import enrollment as crud_enrollment
 from ...crud import course as crud_course
-from ...crud import lesson as crud_lesson
 from ...schemas.enrollment import (
     EnrollmentCreate, EnrollmentUpdate, EnrollmentResponse,
     EnrollmentWithCourse, EnrollmentListResponse, EnrollmentStats
 )
 from ...core.auth import get_current_student, get_current_instructor
+from ...core.pagination import page_fields, short_page_total
 
 router = APIRouter()
 
+# Validates a whole page of /me items in one call
+_enrollments_with_course_adapter = TypeAdapter(List[EnrollmentWithCourse])
+
 @router.post("/", response_model=EnrollmentResponse, status_code=status.HTTP_201_CREATED)
 def enroll_in_course(
     enrollment_in: EnrollmentCreate,
@@ -29,29 +33,21 @@ def enroll_in_course(
     - Returns enrollment details
     """
     # Check if course exists and is published
-    db_course = crud_course.course.get(db, course_id=enrollment_in.course_id)
-    if not db_course:
+    course_meta = crud_course.course.get_meta(db, course_id=enrollment_in.course_id)
+    if not course_meta:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Course not found"
         )
     
     # Only published courses can be enrolled in by students
-    if not db_course.published and current_user["role"] not in ["instructor", "admin"]:
+    if not course_meta.published and current_user["role"] not in ["instructor", "admin"]:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Course is not published"
         )
     
-    # Check if already enrolled
-    existing_enrollment = crud_enrollment.enrollment.get_by_user_and_course(
-        db, user_id=current_user["user_id"], course_id=enrollment_in.course_id
-    )
-    
-    if existing_enrollment:
-        return existing_enrollment
-    
-    # Create enrollment
+    # Create enrollment (returns the existing one if already enrolled)
     try:
         db_enrollment = crud_enrollment.enrollment.create(
             db,
@@ -89,8 +85,8 @@ def get_my_enrollments(
     if search:
         filters["search"] = search
     
-    # Get enrollments
-    enrollments = crud_enrollment.enrollment.get_user_enrollments(
+    # Enrollments with their lesson counts, the total and the user's stats in one query
+    enrollments, total, stats_data = crud_enrollment.enrollment.get_user_enrollments_with_stats(
         db,
         user_id=current_user["user_id"],
         skip=skip,
@@ -98,49 +94,28 @@ def get_my_enrollments(
         filters=filters
     )
     
-    # Convert to response with course details
-    items = []
-    for enroll in enrollments:
-        course = crud_course.course.get(db, course_id=enroll.course_id)
-        if course:
-            # Get progress summary
-            total_lessons = crud_lesson.lesson.count_by_course(
-                db, course_id=course.id, published_only=True
-            )
-            
-            completed_lessons = len([
-                lp for lp in enroll.lesson_progresses 
-                if lp.completed
-            ]) if hasattr(enroll, 'lesson_progresses') else 0
-            
-            items.append(EnrollmentWithCourse(
-                **enroll.to_dict(),
-                course_title=course.title,
-                course_thumbnail=course.thumbnail_url,
-                course_instructor=course.instructor_id,  # Would fetch from User Service in production
-                total_lessons=total_lessons,
-                completed_lessons=completed_lessons
-            ))
-    
-    # Get total count
-    total = crud_enrollment.enrollment.count_user_enrollments(
-        db, user_id=current_user["user_id"], filters=filters
-    )
-    
-    # Get stats
-    stats_data = crud_enrollment.enrollment.get_user_stats(db, current_user["user_id"])
-    stats = EnrollmentStats(**stats_data)
-    
-    return EnrollmentListResponse(
-        items=items,
-        total=total,
-        page=skip // limit + 1,
-        size=limit,
-        pages=(total + limit - 1) // limit,
-        stats=stats
+    # Convert to response with course details (loaded with the enrollments)
+    rows = [
+        {
+            **enroll.to_dict(),
+            "course_title": enroll.course.title,
+            "course_thumbnail": enroll.course.thumbnail_url,
+            "course_instructor": enroll.course.instructor_id,  # Would fetch from User Service in production
+            "total_lessons": total_lessons,
+            "completed_lessons": completed_lessons,
+        }
+        for enroll, total_lessons, completed_lessons in enrollments
+    ]
+    
+    response = EnrollmentListResponse(
+        items=_enrollments_with_course_adapter.validate_python(rows),
+        **page_fields(total, skip, limit),
+        stats=EnrollmentStats(**stats_data)
     )
+    # Already validated; skip FastAPI's second pass over response_model
+    return Response(content=response.model_dump_json(), media_type="application/json")
 
-@router.get("/course/{course_id}/enrollments", response_model=dict)
+@router.get("/course/{course_id:uuid}/enrollments", response_model=dict)
 def get_course_enrollments(
     course_id: uuid.UUID = Path(..., description="Course ID"),
     skip: int = Query(0, ge=0, description="Number of items to skip"),
@@ -155,15 +130,15 @@ def get_course_enrollments(
     - Only course instructor or admin can access
     """
     # Check if course exists
-    db_course = crud_course.course.get(db, course_id=course_id)
-    if not db_course:
+    course_meta = crud_course.course.get_meta(db, course_id=course_id)
+    if not course_meta:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Course not found"
         )
     
     # Check ownership
-    if db_course.instructor_id != current_user["user_id"] and current_user["role"] != "admin":
+    if course_meta.instructor_id != current_user["user_id"] and current_user["role"] != "admin":
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Not authorized to view enrollments for this course"
@@ -188,16 +163,15 @@ def get_course_enrollments(
             "last_lesson_id": enroll.last_lesson_id
         })
     
-    total = crud_enrollment.enrollment.count_course_enrollments(db, course_id)
+    total = short_page_total(skip, len(enrollments), limit)
+    if total is None:
+        total = crud_enrollment.enrollment.count_course_enrollments(db, course_id)
     
     return {
         "course_id": course_id,
-        "course_title": db_course.title,
+        "course_title": course_meta.title,
         "items": items,
-        "total": total,
-        "page": skip // limit + 1,
-        "size": limit,
-        "pages": (total + limit - 1) // limit
+        **page_fields(total, skip, limit)
     }
 
 @router.get("/instructor", response_model=dict)
@@ -246,14 +220,7 @@ def get_instructor_course_enrollments(
         limit=limit
     )
     
-    # Calculate pagination metadata
-    pages = (total + limit - 1) // limit if total > 0 else 0
-    current_page = skip // limit + 1
-    
     return {
         "enrolls": enrolls,
-        "total": total,
-        "page": current_page,
-        "size": limit,
-        "pages": pages
+        **page_fields(total, skip, limit)
     }
\ No newline at end of file
@@ -1,31 +1,129 @@
-from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, status, Query, Path, Form, File, UploadFile
+from typing import List, Optional, Tuple
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, status, Query, Path, Form, File, UploadFile, Request, Response
 from sqlalchemy.orm import Session
+from datetime import datetime
+import base64
+import hashlib
+import logging
 import uuid
 
 from ...database import get_db
 from ...crud import lesson as crud_lesson
 from ...crud import course as crud_course
+from ...crud.course import CourseMeta
+from ...models.lesson import Lesson
 from ...schemas.lesson import (
     LessonCreateForm, LessonUpdate, LessonResponse, 
-    LessonListResponse, ContentType
+    LessonListResponse, ContentType,
+    LessonContentPresignRequest, LessonContentPresignResponse
 )
 from ...core.auth import get_current_user, get_current_instructor, get_current_student, get_current_user_optional
-from ...core.minio_client import minio_client
+from ...core.minio_client import minio_client, PRESIGNED_UPLOAD_EXPIRY
+from ...core.etag import etag_matches
+from ...core.pagination import page_fields
+from ...core.redis import get_cache, set_cache, get_version, bump_version
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
-@router.get("/course/{course_id}", response_model=LessonListResponse)
+# Public (non-owner) lesson listings are cached per course; any lesson write
+# bumps the course's version, invalidating all of its cached pages at once.
+# The same version feeds the ETag, so browsers can revalidate. Responses are
+# private: owners get unpublished lessons from the same URL.
+LESSON_LIST_CACHE_TTL_SECONDS = 60
+LESSON_LIST_CACHE_CONTROL = f"private, max-age={LESSON_LIST_CACHE_TTL_SECONDS}"
+
+def _lessons_version_key(course_id: uuid.UUID) -> str:
+    return f"lessons:version:{course_id}"
+
+# Content types that need an uploaded file or a URL
+FILE_REQUIRED_CONTENT_TYPES = frozenset({
+    ContentType.VIDEO, ContentType.PDF, ContentType.IMAGE, ContentType.AUDIO
+})
+
+def _can_manage(course_meta: CourseMeta, current_user: dict) -> bool:
+    """Course owner or admin"""
+    return current_user["role"] == "admin" or course_meta.instructor_id == current_user["user_id"]
+
+def _check_manages_course(db: Session, course_id: uuid.UUID, current_user: dict) -> CourseMeta:
+    course_meta = crud_course.course.get_meta(db, course_id=course_id)
+    if not course_meta:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Course not found"
+        )
+    if not _can_manage(course_meta, current_user):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not authorized to add lessons to this course"
+        )
+    return course_meta
+
+# Write dependencies: fetch and authorize once per request. FastAPI caches
+# dependency results, so anything else depending on them reuses the lookup.
+def get_managed_course(
+    course_id: uuid.UUID = Form(...),
+    current_user: dict = Depends(get_current_instructor),
+    db: Session = Depends(get_db),
+) -> CourseMeta:
+    """Meta of the form's course_id, if the current user may add lessons to it"""
+    return _check_manages_course(db, course_id, current_user)
+
+def get_managed_lesson(
+    lesson_id: uuid.UUID = Path(..., description="Lesson ID"),
+    current_user: dict = Depends(get_current_instructor),
+    db: Session = Depends(get_db),
+) -> Lesson:
+    """The lesson at lesson_id, if the current user may change it"""
+    db_lesson = crud_lesson.lesson.get(db, lesson_id=lesson_id)
+    if not db_lesson:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Lesson not found"
+        )
+    course_meta = crud_course.course.get_meta(db, course_id=db_lesson.course_id)
+    if not _can_manage(course_meta, current_user):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not authorized to update this lesson"
+        )
+    return db_lesson
+
+# Keyset cursors are the (order_index, created_at, id) of the last lesson on a page
+def _encode_cursor(db_lesson) -> str:
+    raw = f"{db_lesson.order_index}|{db_lesson.created_at.isoformat()}|{db_lesson.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+def _decode_cursor(cursor: str) -> Tuple[int, datetime, uuid.UUID]:
+    try:
+        order_index, created_at, lesson_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+        return int(order_index), datetime.fromisoformat(created_at), uuid.UUID(lesson_id)
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
+
+@router.get("/course/{course_id:uuid}", response_model=LessonListResponse)
 def get_course_lessons(
+    request: Request,
     course_id: uuid.UUID = Path(..., description="Course ID"),
     skip: int = Query(0, ge=0, description="Number of items to skip"),
     limit: int = Query(100, ge=1, le=100, description="Number of items to return"),
+    include_total: bool = Query(True, description="Count all matching lessons"),
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page; replaces skip"),
     db: Session = Depends(get_db),
     current_user: Optional[dict] = Depends(get_current_user_optional),
 ):
     """
     Get all lessons for a course with pagination.
     
+    Pages can be walked with `cursor` (keyset pagination, constant cost at
+    any depth); `skip` is kept for existing clients.
+    With include_total=false no count is computed: total is skip plus the
+    page length and pages is 0.
+    
     Access control:
     - Current instructor (course owner): sees all lessons (published + unpublished)
     - Other users (students, other instructors, guests): see only published lessons from published courses
@@ -34,8 +132,8 @@ def get_course_lessons(
     - Returns paginated list of lessons
     """
     # Check if course exists
-    db_course = crud_course.course.get(db, course_id=course_id)
-    if not db_course:
+    course_meta = crud_course.course.get_meta(db, course_id=course_id)
+    if not course_meta:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Course not found"
@@ -45,7 +143,7 @@ def get_course_lessons(
     is_course_owner = (
         current_user and 
         current_user.get("role") == "instructor" and 
-        db_course.instructor_id == current_user["user_id"]
+        course_meta.instructor_id == current_user["user_id"]
     )
     
     # Access control logic
@@ -54,7 +152,7 @@ def get_course_lessons(
         published_only = False
     else:
         # For non-owners, course must be published
-        if not db_course.published:
+        if not course_meta.published:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Course not found"
@@ -62,29 +160,96 @@ def get_course_lessons(
         # Non-owners only see published lessons
         published_only = True
     
-    # Get lessons
-    lessons = crud_lesson.lesson.get_by_course_paginated(
-        db, 
-        course_id=course_id,
-        skip=skip,
-        limit=limit,
-        published_only=published_only
-    )
+    # Everyone but the owner shares one cached view of the published lessons
+    cache_key = etag = None
+    if not is_course_owner:
+        version = get_version(_lessons_version_key(course_id))
+        if version is not None:
+            digest = hashlib.blake2b(
+                repr((skip, limit, include_total, cursor)).encode(), digest_size=8
+            ).hexdigest()
+            cache_key = f"lessons:list:{course_id}:{version}:{digest}"
+            etag = f'W/"{digest}-{version}"'
+            headers = {"ETag": etag, "Cache-Control": LESSON_LIST_CACHE_CONTROL}
+            if etag_matches(request.headers.get("if-none-match"), etag):
+                return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+            cached_body = get_cache(cache_key)
+            if cached_body is not None:
+                return Response(content=cached_body, media_type="application/json", headers=headers)
     
-    total = crud_lesson.lesson.count_by_course(
-        db, course_id=course_id, published_only=published_only
-    )
+    after = _decode_cursor(cursor) if cursor else None
+    if after is not None:
+        skip = 0
+    
+    if after is not None or not include_total:
+        # One extra row tells whether another page follows
+        lessons = crud_lesson.lesson.get_by_course_paginated(
+            db,
+            course_id=course_id,
+            skip=skip,
+            limit=limit + 1,
+            published_only=published_only,
+            after=after
+        )
+        has_more = len(lessons) > limit
+        lessons = lessons[:limit]
+        if include_total:
+            total = crud_lesson.lesson.count_by_course(
+                db, course_id=course_id, published_only=published_only
+            )
+        else:
+            total = skip + len(lessons)
+    else:
+        # Get lessons and the total count in one query
+        lessons, total = crud_lesson.lesson.get_by_course_with_total(
+            db, 
+            course_id=course_id,
+            skip=skip,
+            limit=limit,
+            published_only=published_only
+        )
+        has_more = skip + len(lessons) < total
     
-    return LessonListResponse(
+    response = LessonListResponse(
         items=lessons,
-        total=total,
-        page=skip // limit + 1,
-        size=limit,
-        pages=(total + limit - 1) // limit
+        **page_fields(total, skip, limit, count_pages=include_total),
+        next_cursor=_encode_cursor(lessons[-1]) if has_more else None
+    )
+    # Validated once above; serialize directly instead of letting FastAPI
+    # validate every lesson again against response_model
+    body = response.model_dump_json().encode()
+    if cache_key is None:
+        return Response(content=body, media_type="application/json")
+    
+    set_cache(cache_key, body, ttl=LESSON_LIST_CACHE_TTL_SECONDS)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+##### Presigned lesson content upload ##############
+# 1. POST /course/{course_id}/content-presign -> {url, object_key}
+# 2. Client PUTs the file straight to `url` (with its Content-Type)
+# 3. Create/update the lesson with content_object_key=object_key
+# Large videos never pass through this service.
+##################################################
+@router.post("/course/{course_id:uuid}/content-presign", response_model=LessonContentPresignResponse)
+def presign_lesson_content_upload(
+    presign_in: LessonContentPresignRequest,
+    course_id: uuid.UUID = Path(..., description="Course ID"),
+    current_user: dict = Depends(get_current_instructor),
+    db: Session = Depends(get_db),
+):
+    """
+    Get a presigned URL to upload lesson content directly to storage
+    """
+    _check_manages_course(db, course_id, current_user)
+    url, object_key = minio_client.presign_lesson_content_upload(str(course_id), presign_in.filename)
+    return LessonContentPresignResponse(
+        url=url,
+        object_key=object_key,
+        expires_in=int(PRESIGNED_UPLOAD_EXPIRY.total_seconds())
     )
 
 @router.post("/", response_model=LessonResponse, status_code=status.HTTP_201_CREATED)
-async def create_lesson(
+def create_lesson(
     title: str = Form(..., min_length=1, max_length=255),
     description: Optional[str] = Form(None),
     content_type: ContentType = Form(...),
@@ -95,7 +260,8 @@ async def create_lesson(
     course_id: uuid.UUID = Form(...),
     content_file: Optional[UploadFile] = File(None),
     content_url: Optional[str] = Form(None),
-    current_user: dict = Depends(get_current_instructor),
+    content_object_key: Optional[str] = Form(None),
+    course_meta: CourseMeta = Depends(get_managed_course),
     db: Session = Depends(get_db),
 ):
     """
@@ -111,27 +277,13 @@ async def create_lesson(
     - **course_id**: Parent course ID (required)
     - **content_file**: Content file (required for video/pdf/image/audio types)
     - **content_url**: Direct URL to content (alternative to file upload)
+    - **content_object_key**: object_key from a presigned content upload (alternative to file upload)
     """
     
     try:
-        # Check if course exists and user owns it
-        db_course = crud_course.course.get(db, course_id=course_id)
-        if not db_course:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Course not found"
-            )
-        
-        # Verify ownership
-        if db_course.instructor_id != current_user["user_id"] and current_user["role"] != "admin":
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="Not authorized to add lessons to this course"
-            )
-        
         # Validate file presence based on content type
-        if content_type in [ContentType.VIDEO, ContentType.PDF, ContentType.IMAGE, ContentType.AUDIO]:
-            if not content_file and not content_url:
+        if content_type in FILE_REQUIRED_CONTENT_TYPES:
+            if not content_file and not content_url and not content_object_key:
                 raise HTTPException(
                     status_code=status.HTTP_400_BAD_REQUEST,
                     detail=f"Content file or URL is required for {content_type} lessons"
@@ -156,18 +308,25 @@ async def create_lesson(
         # Upload file if provided
         final_content_url = content_url
         if content_file and content_file.filename:
-            final_content_url = await minio_client.upload_lesson_content(
-                content_file, 
+            final_content_url = minio_client.put_lesson_content(
+                content_file.file,
                 str(course_id),
                 str(uuid.uuid4()),  # Temporary lesson ID
-                # content_type.value
+                length=content_file.size if content_file.size is not None else -1,
+                filename=content_file.filename,
+                content_type=content_file.content_type
+            )
+            logger.debug("Uploaded lesson content to %s", final_content_url)
+        elif content_object_key:
+            final_content_url = minio_client.verify_lesson_content_upload(
+                str(course_id), content_object_key
             )
-            print(f"final_content_url: {final_content_url}")
         
         # Create lesson in database
         db_lesson = crud_lesson.lesson.create_from_form(
             db, obj_in=lesson_form, content_url=final_content_url
         )
+        bump_version(_lessons_version_key(course_id))
         
         return db_lesson
         
@@ -185,7 +344,7 @@ async def create_lesson(
             detail=f"Lesson creation failed: {str(e)}"
         )
 
-@router.get("/{lesson_id}", response_model=LessonResponse)
+@router.get("/{lesson_id:uuid}", response_model=LessonResponse)
 def get_lesson(
     lesson_id: uuid.UUID = Path(..., description="Lesson ID"),
     db: Session = Depends(get_db),
@@ -209,19 +368,19 @@ def get_lesson(
         )
     
     # Check if user can access this lesson
-    db_course = crud_course.course.get(db, course_id=db_lesson.course_id)
+    course_meta = crud_course.course.get_meta(db, course_id=db_lesson.course_id)
     
     # Determine if user is the course owner (instructor)
     is_course_owner = (
         current_user and 
         current_user.get("role") == "instructor" and 
-        db_course.instructor_id == current_user["user_id"]
+        course_meta.instructor_id == current_user["user_id"]
     )
     
     # Access control logic
     if not is_course_owner:
         # For non-owners, course must be published
-        if not db_course.published:
+        if not course_meta.published:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Lesson not found"
@@ -236,19 +395,21 @@ def get_lesson(
     
     return db_lesson
 
-@router.put("/{lesson_id}", response_model=LessonResponse)
-async def update_lesson(
+@router.put("/{lesson_id:uuid}", response_model=LessonResponse)
+def update_lesson(
+    background_tasks: BackgroundTasks,
     lesson_id: uuid.UUID = Path(..., description="Lesson ID"),
     title: Optional[str] = Form(None, min_length=1, max_length=255),
     description: Optional[str] = Form(None),
     content_type: Optional[ContentType] = Form(None),
     content_url: Optional[str] = Form(None),
+    content_object_key: Optional[str] = Form(None),
     duration_minutes: Optional[int] = Form(None, ge=0),
     order_index: Optional[int] = Form(None, ge=0),
     is_preview: Optional[bool] = Form(None),
     is_published: Optional[bool] = Form(None),
     content_file: Optional[UploadFile] = File(None),
-    current_user: dict = Depends(get_current_instructor),
+    db_lesson: Lesson = Depends(get_managed_lesson),
     db: Session = Depends(get_db),
 ):
     """
@@ -256,24 +417,8 @@ async def update_lesson(
     
     - **lesson_id**: UUID of the lesson to update
     - All other fields are optional - only provided fields will be updated
-    - Can update content by providing new file or URL
+    - Can update content by providing new file, presigned upload object_key or URL
     """
-    # Check if lesson exists
-    db_lesson = crud_lesson.lesson.get(db, lesson_id=lesson_id)
-    if not db_lesson:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Lesson not found"
-        )
-    
-    # Check ownership
-    db_course = crud_course.course.get(db, course_id=db_lesson.course_id)
-    if db_course.instructor_id != current_user["user_id"] and current_user["role"] != "admin":
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Not authorized to update this lesson"
-        )
-    
     # Prepare update data
     update_data = {}
     if title is not None:
@@ -291,28 +436,34 @@ async def update_lesson(
     if is_published is not None:
         update_data["is_published"] = is_published
     
-    # Handle file upload if provided
+    # Handle file upload if provided; the old file is only removed once the
+    # lesson points at its replacement
+    replaced_url = None
     if content_file and content_file.filename:
-        # Delete old content file from MinIO if it exists
-        if db_lesson.content_url:
-            old_object_name = minio_client.extract_object_name(db_lesson.content_url)
-            if old_object_name:
-                minio_client.delete_file(old_object_name)
-        
         # Upload new file
-        new_content_url = await minio_client.upload_lesson_content(
-            content_file,
+        new_content_url = minio_client.put_lesson_content(
+            content_file.file,
             str(db_lesson.course_id),
             str(lesson_id),
-            # update_data.get("content_type", db_lesson.content_type).value
+            length=content_file.size if content_file.size is not None else -1,
+            filename=content_file.filename,
+            content_type=content_file.content_type
         )
         update_data["content_url"] = new_content_url
+        replaced_url = db_lesson.content_url
+    elif content_object_key:
+        verified_url = minio_client.verify_lesson_content_upload(
+            str(db_lesson.course_id), content_object_key
+        )
+        # Resubmitting the current key must not delete the live object
+        if db_lesson.content_url != verified_url:
+            replaced_url = db_lesson.content_url
+        
+        update_data["content_url"] = verified_url
     elif content_url is not None:
-        # If changing to a different URL, delete old content file from MinIO
-        if db_lesson.content_url and db_lesson.content_url != content_url:
-            old_object_name = minio_client.extract_object_name(db_lesson.content_url)
-            if old_object_name:
-                minio_client.delete_file(old_object_name)
+        # If changing to a different URL, the old content file goes
+        if db_lesson.content_url != content_url:
+            replaced_url = db_lesson.content_url
         
         update_data["content_url"] = content_url
     
@@ -324,9 +475,16 @@ async def update_lesson(
         db, db_obj=db_lesson, obj_in=lesson_update
     )
     
+    # Delete the replaced content file after the response is sent
+    if replaced_url:
+        old_object_name = minio_client.extract_object_name(replaced_url)
+        if old_object_name:
+            background_tasks.add_task(minio_client.delete_file, old_object_name)
+    bump_version(_lessons_version_key(db_lesson.course_id))
+    
     return db_lesson
 
-@router.delete("/{lesson_id}", status_code=status.HTTP_204_NO_CONTENT)
+@router.delete("/{lesson_id:uuid}", status_code=status.HTTP_204_NO_CONTENT)
 def delete_lesson(
     lesson_id: uuid.UUID = Path(..., description="Lesson ID"),
     current_user: dict = Depends(get_current_instructor),
@@ -338,28 +496,29 @@ def delete_lesson(
     - **lesson_id**: UUID of the lesson to delete
     - Returns 204 No Content on success
     """
-    db_lesson = crud_lesson.lesson.get(db, lesson_id=lesson_id)
-    if not db_lesson:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Lesson not found"
-        )
-    
-    # Check ownership
-    db_course = crud_course.course.get(db, course_id=db_lesson.course_id)
-    if db_course.instructor_id != current_user["user_id"] and current_user["role"] != "admin":
+    # Ownership check and delete in a single DELETE ... RETURNING
+    deleted = crud_lesson.lesson.delete_owned(
+        db,
+        lesson_id=lesson_id,
+        instructor_id=None if current_user["role"] == "admin" else current_user["user_id"]
+    )
+    if deleted is None:
+        if crud_lesson.lesson.get(db, lesson_id=lesson_id) is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Lesson not found"
+            )
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Not authorized to delete this lesson"
         )
     
-    # Delete content file from MinIO if exists
-    if db_lesson.content_url:
-        old_object_name = minio_client.extract_object_name(db_lesson.content_url)
+    bump_version(_lessons_version_key(deleted.course_id))
+    
+    # Delete content file from MinIO once the row is gone
+    if deleted.content_url:
+        old_object_name = minio_client.extract_object_name(deleted.content_url)
         if old_object_name:
             minio_client.delete_file(old_object_name)
     
-    # Delete lesson from database
-    crud_lesson.lesson.delete(db, lesson_id=lesson_id)
-    
     return None
@@ -1,5 +1,9 @@
-from typing import Optional
-from jose import jwt, JWTError, ExpiredSignatureError
+import hashlib
+import threading
+import time
+from typing import Optional, Tuple
+from cachetools import TTLCache
+import jwt
 from fastapi import HTTPException, status, Depends
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from .config import get_settings
@@ -8,38 +12,77 @@ settings = get_settings()
 
 JWT_SECRET_KEY = settings.jwt_secret
 JWT_ALGORITHM = settings.jwt_algorithm
+JWT_ALGORITHMS = [JWT_ALGORITHM]
+
+# Decoded tokens are cached so repeated requests with the same bearer token
+# skip signature verification. Entries never outlive the token's own `exp`.
+JWT_CACHE_TTL_SECONDS = 30
+_JWT_CACHE = TTLCache(maxsize=8192, ttl=JWT_CACHE_TTL_SECONDS)
+_JWT_CACHE_LOCK = threading.Lock()
 
 security = HTTPBearer()
 
-def decode_jwt(token: str):
+def _token_key(token: str) -> bytes:
+    """Hash the token so raw credentials are never kept in memory."""
+    return hashlib.blake2b(token.encode(), digest_size=16).digest()
+
+def _decode_token(token: str) -> Tuple[dict, Optional[float]]:
     """
-    Decodes a JWT token using the HS256 algorithm and the shared secret.
+    Decodes a JWT token using the HS256 algorithm and the shared secret (PyJWT).
     Maps Node.js camelCase 'userId' to Pythonic 'user_id'.
+    Returns the user and the token's `exp` claim (or None).
     """
     try:
         payload = jwt.decode(
             token,
             JWT_SECRET_KEY,
-            algorithms=[JWT_ALGORITHM]
+            algorithms=JWT_ALGORITHMS,
+            options={"verify_aud": False}
         )
 
-        return {
-            "user_id": payload.get("userId"),
-            "role": payload.get("role"),
-        }
-
-    except ExpiredSignatureError:
+    except jwt.ExpiredSignatureError:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Token expired"
         )
 
-    except JWTError:
+    except jwt.PyJWTError:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid token"
         )
 
+    return {
+        "user_id": payload.get("userId"),
+        "role": payload.get("role"),
+    }, payload.get("exp")
+
+def decode_jwt(token: str):
+    """Decode a JWT, serving recently verified tokens from the cache."""
+    key = _token_key(token)
+    now = time.time()
+
+    with _JWT_CACHE_LOCK:
+        cached = _JWT_CACHE.get(key)
+    if cached is not None:
+        user, expires_at = cached
+        if expires_at > now:
+            return dict(user)
+        with _JWT_CACHE_LOCK:
+            _JWT_CACHE.pop(key, None)
+
+    user, exp = _decode_token(token)
+
+    # Never serve a cached entry past the token expiry
+    expires_at = now + JWT_CACHE_TTL_SECONDS
+    if exp is not None:
+        expires_at = min(expires_at, float(exp))
+    if expires_at > now:
+        with _JWT_CACHE_LOCK:
+            _JWT_CACHE[key] = (user, expires_at)
+
+    return dict(user)
+
 def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)):
     token = credentials.credentials
     return decode_jwt(token)
@@ -11,6 +11,8 @@ class Settings(BaseSettings):
     
     # Database
     database_url: str = Field(..., validation_alias="POSTGRES_URL")
+    database_pool_size: int = Field(default=20, validation_alias="DATABASE_POOL_SIZE")
+    database_max_overflow: int = Field(default=40, validation_alias="DATABASE_MAX_OVERFLOW")
     
     # JWT
     jwt_secret: str = Field(..., validation_alias="JWT_SECRET_KEY")
@@ -24,6 +26,11 @@ class Settings(BaseSettings):
     minio_bucket_name: str = Field(default="courses-media", validation_alias="MINIO_BUCKET_NAME")
     minio_secure: bool = Field(default=False, validation_alias="MINIO_SECURE")
     
+    # Redis
+    redis_host: str = Field(default="localhost", validation_alias="REDIS_HOST")
+    redis_port: int = Field(default=6379, validation_alias="REDIS_PORT")
+    redis_ttl_seconds: int = Field(default=60, validation_alias="REDIS_TTL_SECONDS")
+    
     # CORS
     cors_origins: list = ["*"]
     
@@ -0,0 +1,17 @@
+from typing import Optional
+
+def _opaque_tag(tag: str) -> str:
+    tag = tag.strip()
+    return tag[2:] if tag.startswith("W/") else tag
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    Whether an If-None-Match header matches `etag`: `*`, or any tag in the
+    comma-separated list under weak comparison (RFC 9110, 13.1.2 / 13.1.3).
+    """
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    current = _opaque_tag(etag)
+    return any(_opaque_tag(tag) == current for tag in if_none_match.split(","))
@@ -1,24 +1,83 @@
 from minio import Minio
+from minio.deleteobjects import DeleteObject
 from minio.error import S3Error
 import uuid
-from typing import Optional, Tuple
+from typing import BinaryIO, List, Optional, Tuple
 from fastapi import UploadFile, HTTPException
+from urllib3.connection import HTTPConnection
 from .config import get_settings
+import certifi
 import os
-import io
+import socket
+import urllib3
 from datetime import datetime, timedelta
 
 settings = get_settings()
 
+# Thumbnail constraints, shared by direct and presigned uploads
+THUMBNAIL_CONTENT_TYPES = frozenset({
+    'image/jpeg', 'image/jpg', 'image/png', 
+    'image/gif', 'image/webp', 'image/svg+xml'
+})
+THUMBNAIL_EXTENSIONS = frozenset({'.jpg', '.jpeg', '.png', '.gif', '.webp', '.svg'})
+THUMBNAIL_TYPE_ERROR = f"Unsupported file type. Allowed: {', '.join(sorted(THUMBNAIL_CONTENT_TYPES))}"
+THUMBNAIL_EXTENSION_ERROR = f"Unsupported file extension. Allowed: {', '.join(sorted(THUMBNAIL_EXTENSIONS))}"
+THUMBNAIL_MAX_SIZE = 5 * 1024 * 1024  # 5MB
+PRESIGNED_UPLOAD_EXPIRY = timedelta(minutes=5)
+UPLOAD_PART_SIZE = 10 * 1024 * 1024  # multipart chunk size for streamed uploads
+# Lesson content is mostly video; larger parts mean fewer part requests.
+# Files smaller than one part still go up as a single PUT.
+LESSON_UPLOAD_PART_SIZE = 16 * 1024 * 1024
+# Known-size uploads aim for about this many parts, so files over 256 MiB
+# get proportionally larger parts, up to the max below.
+LESSON_UPLOAD_TARGET_PARTS = 16
+LESSON_UPLOAD_MAX_PART_SIZE = 64 * 1024 * 1024
+# Parts uploaded concurrently, each on its own connection. minio-py blocks
+# the reader while all workers are busy, so one upload buffers at most
+# (parallelism + 1) parts.
+LESSON_UPLOAD_PARALLELISM = 4
+# Connections kept alive to MinIO. minio-py's default pool keeps 10, fewer
+# than the threadpool plus parallel part uploads use, so the extra sockets
+# were closed after each request and re-opened on the next.
+MINIO_POOL_MAXSIZE = 64
+MINIO_TIMEOUT_SECONDS = 300
+
+def _minio_http_client() -> urllib3.PoolManager:
+    """minio-py's default pool, larger and with TCP keepalive on idle sockets"""
+    return urllib3.PoolManager(
+        timeout=urllib3.Timeout(connect=MINIO_TIMEOUT_SECONDS, read=MINIO_TIMEOUT_SECONDS),
+        maxsize=MINIO_POOL_MAXSIZE,
+        socket_options=HTTPConnection.default_socket_options + [
+            (socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+        ],
+        cert_reqs="CERT_REQUIRED",
+        ca_certs=os.environ.get("SSL_CERT_FILE") or certifi.where(),
+        retries=urllib3.Retry(
+            total=5,
+            backoff_factor=0.2,
+            status_forcelist=[500, 502, 503, 504]
+        )
+    )
+
+def lesson_part_size(length: int) -> int:
+    """Multipart part size for a lesson upload of `length` bytes (-1 if unknown)"""
+    return min(
+        LESSON_UPLOAD_MAX_PART_SIZE,
+        max(LESSON_UPLOAD_PART_SIZE, length // LESSON_UPLOAD_TARGET_PARTS)
+    )
+
 class MinIOClient:
     def __init__(self):
         self.client = Minio(
             settings.minio_endpoint,
             access_key=settings.minio_access_key,
             secret_key=settings.minio_secret_key,
-            secure=settings.minio_secure
+            secure=settings.minio_secure,
+            http_client=_minio_http_client()
         )
         self.bucket_name = settings.minio_bucket_name
+        # Object URLs look like http(s)://endpoint/bucket/object_name
+        self._bucket_path = f"/{self.bucket_name}/"
         self._ensure_bucket_exists()
     
     def _ensure_bucket_exists(self):
@@ -37,137 +96,200 @@ class MinIOClient:
         Validate thumbnail image file
         Returns: (is_valid, error_message)
         """
-        allowed_types = [
-            'image/jpeg', 'image/jpg', 'image/png', 
-            'image/gif', 'image/webp', 'image/svg+xml'
-        ]
-        
         # Check file type
-        if file.content_type not in allowed_types:
-            return False, f"Unsupported file type. Allowed: {', '.join(allowed_types)}"
+        if file.content_type not in THUMBNAIL_CONTENT_TYPES:
+            return False, THUMBNAIL_TYPE_ERROR
         
-        # Check file size (max 5MB)
-        max_size = 5 * 1024 * 1024  # 5MB
-        file.file.seek(0, os.SEEK_END)
-        file_size = file.file.tell()
-        file.file.seek(0)
+        # Check file extension (before the size, so rejects never touch the body)
+        file_extension = os.path.splitext(file.filename or "")[1].lower()
+        if file_extension not in THUMBNAIL_EXTENSIONS:
+            return False, THUMBNAIL_EXTENSION_ERROR
+        
+        # Check file size (max 5MB); Starlette records it while spooling
+        max_size = THUMBNAIL_MAX_SIZE
+        file_size = file.size
+        if file_size is None:
+            file.file.seek(0, os.SEEK_END)
+            file_size = file.file.tell()
+            file.file.seek(0)
         
         if file_size > max_size:
             return False, f"File too large. Max size: 5MB"
         
-        # Check file extension
-        allowed_extensions = ['.jpg', '.jpeg', '.png', '.gif', '.webp', '.svg']
-        file_extension = os.path.splitext(file.filename or "")[1].lower()
-        if file_extension not in allowed_extensions:
-            return False, f"Unsupported file extension. Allowed: {', '.join(allowed_extensions)}"
-        
         return True, ""
     
-    def extract_object_name(self, url: str) -> str:
-        """Extract object name from full MinIO URL"""
-        try:
-            # URL format: http(s)://endpoint/bucket/object_name
-            # Split by bucket name to get the path after it
-            parts = url.split(f"/{self.bucket_name}/")
-            if len(parts) > 1:
-                return parts[1]
-            return ""
-        except Exception:
-            return ""
-
-    async def upload_course_thumbnail(
-        self, 
-        file: UploadFile, 
-        course_id: str, 
-        delete_old: bool = True,
-        old_thumbnail_url: Optional[str] = None
-    ) -> Tuple[str, Optional[str]]:
-        """
-        Upload course thumbnail to MinIO
-        
-        Returns: (new_thumbnail_url, old_thumbnail_object_name)
-        """
-        # Validate thumbnail file
+    def validate_thumbnail(self, file: UploadFile):
+        """Raise a 400 if the thumbnail file is not acceptable"""
         is_valid, error_msg = self._validate_thumbnail_file(file)
         if not is_valid:
             raise HTTPException(status_code=400, detail=error_msg)
+    
+    def thumbnail_prefix(self, course_id: str) -> str:
+        return f"courses/{course_id}/thumbnails/"
+    
+    def get_object_url(self, object_name: str) -> str:
+        protocol = "https" if settings.minio_secure else "http"
+        return f"{protocol}://{settings.minio_endpoint}/{self.bucket_name}/{object_name}"
+    
+    def presign_thumbnail_upload(self, course_id: str, filename: str) -> Tuple[str, str]:
+        """
+        Create a presigned PUT URL so the client uploads the thumbnail directly
         
-        # Delete old thumbnail if requested
-        old_object_name = None
-        if delete_old and old_thumbnail_url:
-            old_object_name = self.extract_object_name(old_thumbnail_url)
-            if old_object_name:
-                self.delete_file(old_object_name)
+        Returns: (upload_url, object_name)
+        """
+        file_extension = os.path.splitext(filename)[1].lower()
+        if file_extension not in THUMBNAIL_EXTENSIONS:
+            raise HTTPException(
+                status_code=400,
+                detail=THUMBNAIL_EXTENSION_ERROR
+            )
         
+        object_name = f"{self.thumbnail_prefix(course_id)}{uuid.uuid4()}{file_extension}"
+        return self._presigned_put(object_name), object_name
+    
+    def _presigned_put(self, object_name: str) -> str:
         try:
-            # Generate unique filename
-            file_extension = os.path.splitext(file.filename or "thumbnail")[1]
-            filename = f"{uuid.uuid4()}{file_extension}"
-            object_name = f"courses/{course_id}/thumbnails/{filename}"
-            
-            # Read file content
-            content = await file.read()
-            data_stream = io.BytesIO(content)
-            
-            # Upload to MinIO
-            self.client.put_object(
-                bucket_name=self.bucket_name,
-                object_name=object_name,
-                data=data_stream,
-                length=len(content),
-                content_type=file.content_type or "image/jpeg"
+            return self.client.presigned_put_object(
+                self.bucket_name, object_name, expires=PRESIGNED_UPLOAD_EXPIRY
             )
-            
-            # Generate URL
-            protocol = "https" if settings.minio_secure else "http"
-            new_url = f"{protocol}://{settings.minio_endpoint}/{self.bucket_name}/{object_name}"
-            
-            return new_url, old_object_name
-            
         except S3Error as e:
             raise HTTPException(
                 status_code=500,
-                detail=f"Thumbnail upload failed: {str(e)}"
+                detail=f"Could not create upload URL: {str(e)}"
             )
-        finally:
-            await file.close()
     
-    async def upload_lesson_content(self, file: UploadFile, course_id: str, lesson_id: str = None) -> str:
+    def verify_thumbnail_upload(self, course_id: str, object_name: str):
+        """
+        Check a presigned thumbnail upload landed and meets the thumbnail rules.
+        Rejected objects are removed.
+        """
+        if not object_name.startswith(self.thumbnail_prefix(course_id)):
+            raise HTTPException(status_code=400, detail="Object does not belong to this course")
+        
+        try:
+            stat = self.client.stat_object(self.bucket_name, object_name)
+        except S3Error:
+            raise HTTPException(status_code=400, detail="Uploaded thumbnail not found")
+        
+        error_msg = None
+        if stat.content_type not in THUMBNAIL_CONTENT_TYPES:
+            error_msg = THUMBNAIL_TYPE_ERROR
+        elif stat.size > THUMBNAIL_MAX_SIZE:
+            error_msg = "File too large. Max size: 5MB"
+        if error_msg:
+            self.delete_file(object_name)
+            raise HTTPException(status_code=400, detail=error_msg)
+    
+    def lesson_content_prefix(self, course_id: str) -> str:
+        return f"courses/{course_id}/assets/"
+    
+    def presign_lesson_content_upload(self, course_id: str, filename: str) -> Tuple[str, str]:
         """
-        Upload lesson content file to MinIO
+        Create a presigned PUT URL so the client uploads lesson content directly
+        
+        Returns: (upload_url, object_name)
+        """
+        file_extension = os.path.splitext(filename)[1]
+        object_name = f"{self.lesson_content_prefix(course_id)}{uuid.uuid4()}{file_extension}"
+        return self._presigned_put(object_name), object_name
+    
+    def verify_lesson_content_upload(self, course_id: str, object_name: str) -> str:
         """
+        Check a presigned lesson content upload landed
+        
+        Returns: the content URL
+        """
+        if not object_name.startswith(self.lesson_content_prefix(course_id)):
+            raise HTTPException(status_code=400, detail="Object does not belong to this course")
         
         try:
-            file_extension = os.path.splitext(file.filename or "")[1]
-            filename = f"{uuid.uuid4()}{file_extension}"
-            
-            if lesson_id:
-                object_name = f"courses/{course_id}/lessons/{lesson_id}/{filename}"
-            else:
-                object_name = f"courses/{course_id}/assets/{filename}"
-            
-            content = await file.read()
-            data_stream = io.BytesIO(content)
-            data_stream.seek(0)
+            self.client.stat_object(self.bucket_name, object_name)
+        except S3Error:
+            raise HTTPException(status_code=400, detail="Uploaded content not found")
+        
+        return self.get_object_url(object_name)
+    
+    def extract_object_name(self, url: str) -> str:
+        """Extract object name from full MinIO URL ("" if it is not one of ours)"""
+        # Everything after the first /bucket/, without any query string
+        _, found, object_name = url.partition(self._bucket_path)
+        return object_name.partition("?")[0] if found else ""
 
+    def new_thumbnail_object_name(self, course_id: str, filename: Optional[str] = None) -> str:
+        """Unique object name for a course thumbnail, keeping the file extension"""
+        file_extension = os.path.splitext(filename or "thumbnail")[1]
+        return f"{self.thumbnail_prefix(course_id)}{uuid.uuid4()}{file_extension}"
+    
+    def put_course_thumbnail(
+        self,
+        data: BinaryIO,
+        course_id: str,
+        length: int = -1,
+        filename: Optional[str] = None,
+        content_type: Optional[str] = None,
+        object_name: Optional[str] = None
+    ) -> str:
+        """
+        Store an already-validated thumbnail in MinIO (blocking)
+        With length=-1 the data is streamed as a multipart upload.
+        Pass object_name to store it under a name picked in advance.
+        
+        Returns: the thumbnail URL
+        """
+        if object_name is None:
+            object_name = self.new_thumbnail_object_name(course_id, filename)
+        
+        self.client.put_object(
+            bucket_name=self.bucket_name,
+            object_name=object_name,
+            data=data,
+            length=length,
+            part_size=UPLOAD_PART_SIZE,
+            content_type=content_type or "image/jpeg"
+        )
+        
+        return self.get_object_url(object_name)
+    
+    def put_lesson_content(
+        self,
+        data: BinaryIO,
+        course_id: str,
+        lesson_id: Optional[str] = None,
+        length: int = -1,
+        filename: Optional[str] = None,
+        content_type: Optional[str] = None
+    ) -> str:
+        """
+        Store a lesson content file in MinIO (blocking)
+        The data is streamed, so memory use is bounded by one part.
+        
+        Returns: the content URL
+        """
+        file_extension = os.path.splitext(filename or "")[1]
+        name = f"{uuid.uuid4()}{file_extension}"
+        
+        if lesson_id:
+            object_name = f"courses/{course_id}/lessons/{lesson_id}/{name}"
+        else:
+            object_name = f"courses/{course_id}/assets/{name}"
+        
+        try:
             self.client.put_object(
                 bucket_name=self.bucket_name,
                 object_name=object_name,
-                data=data_stream,
-                length=len(content),
-                content_type=file.content_type or "application/octet-stream"
+                data=data,
+                length=length,
+                part_size=lesson_part_size(length),
+                num_parallel_uploads=LESSON_UPLOAD_PARALLELISM,
+                content_type=content_type or "application/octet-stream"
             )
-            
-            url = f"http://{settings.minio_endpoint}/{self.bucket_name}/{object_name}"
-            return url
-            
         except S3Error as e:
             raise HTTPException(
                 status_code=500,
                 detail=f"File upload failed: {str(e)}"
             )
-        finally:
-            await file.close()
+        
+        return f"http://{settings.minio_endpoint}/{self.bucket_name}/{object_name}"
     
     def delete_file(self, object_name: str):
         """Delete file from MinIO"""
@@ -176,6 +298,24 @@ class MinIOClient:
         except S3Error:
             pass
     
+    def delete_files(self, object_names: List[str]) -> List[str]:
+        """
+        Delete several files from MinIO in bulk (DeleteObjects, 1000 keys per request)
+        
+        Returns: object names that could not be deleted
+        """
+        if not object_names:
+            return []
+        try:
+            # remove_objects is lazy; iterating it sends the requests
+            errors = self.client.remove_objects(
+                self.bucket_name,
+                [DeleteObject(object_name) for object_name in object_names]
+            )
+            return [error.name for error in errors]
+        except S3Error:
+            return list(object_names)
+    
 
 
 minio_client = MinIOClient()
\ No newline at end of file
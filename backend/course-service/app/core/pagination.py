@@ -0,0 +1,22 @@
+from typing import Dict, Optional
+
+def page_fields(total: int, skip: int, limit: int, count_pages: bool = True) -> Dict[str, int]:
+    """
+    The total/page/size/pages fields shared by every paginated response.
+    With count_pages=False (total not counted) pages is reported as 0.
+    """
+    return {
+        "total": total,
+        "page": skip // limit + 1,
+        "size": limit,
+        "pages": -(-total // limit) if count_pages else 0,
+    }
+
+def short_page_total(skip: int, page_len: int, limit: int) -> Optional[int]:
+    """
+    The exact total when a page came back short, so no COUNT is needed;
+    None when the page is full or empty past the first one.
+    """
+    if page_len < limit and (page_len or not skip):
+        return skip + page_len
+    return None
@@ -0,0 +1,134 @@
+from typing import Any, Dict, List, Optional
+import logging
+
+from .config import get_settings
+
+logger = logging.getLogger(__name__)
+
+_client = None
+
+def _get_client():
+    """
+    Lazily build the Redis client on first use.
+    Every helper fails soft: with Redis down, callers just skip caching.
+    """
+    global _client
+    if _client is None:
+        import redis
+
+        settings = get_settings()
+        # Shared pool: callers wait briefly for a free connection instead of
+        # opening unbounded new ones under load
+        pool = redis.BlockingConnectionPool(
+            host=settings.redis_host,
+            port=settings.redis_port,
+            max_connections=32,
+            timeout=1,
+            socket_connect_timeout=1
+        )
+        _client = redis.Redis(connection_pool=pool)
+    return _client
+
+def get_cache(key: str) -> Optional[bytes]:
+    """Get raw bytes from Redis cache."""
+    try:
+        return _get_client().get(key)
+    except Exception as e:
+        logger.error(f"Redis get error for key {key}: {e}")
+        return None
+
+def set_cache(key: str, value: bytes, ttl: Optional[int] = None):
+    """Set raw bytes in Redis cache with TTL."""
+    if ttl is None:
+        ttl = get_settings().redis_ttl_seconds
+    try:
+        _get_client().setex(key, ttl, value)
+    except Exception as e:
+        logger.error(f"Redis set error for key {key}: {e}")
+
+def delete_cache(key: str):
+    """Delete data from Redis cache."""
+    try:
+        _get_client().delete(key)
+    except Exception as e:
+        logger.error(f"Redis delete error for key {key}: {e}")
+
+def get_hash_fields(key: str, fields: List[str]) -> Optional[List[bytes]]:
+    """HMGET a hash; None if any field is missing or Redis is unavailable."""
+    try:
+        values = _get_client().hmget(key, fields)
+    except Exception as e:
+        logger.error(f"Redis hmget error for key {key}: {e}")
+        return None
+    return None if any(value is None for value in values) else values
+
+def set_hash(
+    key: str,
+    mapping: Dict[str, Any],
+    ttl: int,
+    version_key: Optional[str] = None,
+    version: Optional[int] = None
+) -> bool:
+    """
+    HSET a hash and its TTL in one round trip.
+    With version_key, the write only happens while that counter still equals
+    `version` (WATCH/MULTI), so data read before an invalidation is dropped.
+    Returns whether the hash was written.
+    """
+    from redis.exceptions import WatchError
+
+    try:
+        with _get_client().pipeline(transaction=True) as pipe:
+            if version_key is not None:
+                pipe.watch(version_key)
+                if int(pipe.get(version_key) or 0) != version:
+                    return False
+                pipe.multi()
+            pipe.hset(key, mapping=mapping)
+            pipe.expire(key, ttl)
+            pipe.execute()
+        return True
+    except WatchError:
+        return False
+    except Exception as e:
+        logger.error(f"Redis hset error for key {key}: {e}")
+        return False
+
+# --- Versioned namespaces ---
+# Cache keys embed a version counter; bumping it invalidates every key in
+# the namespace at once and the old entries simply expire.
+
+def get_version(version_key: str) -> Optional[int]:
+    """Current value of a version counter, or None if Redis is unavailable."""
+    try:
+        return int(_get_client().get(version_key) or 0)
+    except Exception as e:
+        logger.error(f"Redis get error for key {version_key}: {e}")
+        return None
+
+def bump_version(version_key: str):
+    """Increment a version counter."""
+    try:
+        _get_client().incr(version_key)
+    except Exception as e:
+        logger.error(f"Redis incr error for key {version_key}: {e}")
+
+def bump_versions(*version_keys: str):
+    """Increment several version counters in one round trip."""
+    try:
+        with _get_client().pipeline(transaction=True) as pipe:
+            for version_key in version_keys:
+                pipe.incr(version_key)
+            pipe.execute()
+    except Exception as e:
+        logger.error(f"Redis incr error for keys {version_keys}: {e}")
+
+def invalidate_cache(key: str, version_key: str):
+    """Drop a cache entry and bump its version in one round trip."""
+    try:
+        with _get_client().pipeline(transaction=True) as pipe:
+            pipe.delete(key)
+            pipe.incr(version_key)
+            pipe.execute()
+    except Exception as e:
+        logger.error(f"Redis invalidation error for key {key}: {e}")
@@ -1,9 +1,45 @@
-from typing import List, Optional, Dict, Any
+import threading
+from typing import List, NamedTuple, Optional, Dict, Any, Sequence, Tuple, Union
+from cachetools import TTLCache
 from sqlalchemy.orm import Session
-from sqlalchemy import desc, asc, or_, and_
+from sqlalchemy.engine import Row
+from sqlalchemy import desc, asc, or_, and_, func, select, update, delete, tuple_
+from datetime import datetime
 import uuid
+from ..core.redis import get_hash_fields, set_hash, get_version, invalidate_cache
 from ..models.course import Course
-from ..schemas.course import CourseUpdateForm, CourseCreateForm
+from ..schemas.course import CourseUpdateForm, CourseCreateForm, CourseFilters
+
+# Filter sets behind the public catalog (guests and students). Their totals
+# change slowly, so an exact count cached for a short while is served instead
+# of counting every matching row per page view.
+CACHED_COUNT_FILTERS = frozenset({CourseFilters(), CourseFilters(published=True)})
+COUNT_CACHE_TTL_SECONDS = 30
+_COUNT_CACHE = TTLCache(maxsize=16, ttl=COUNT_CACHE_TTL_SECONDS)
+_COUNT_CACHE_LOCK = threading.Lock()
+
+# Ownership and visibility checks (courses, lessons, enrollments) only need
+# these columns. They are cached per worker, backed by a Redis hash shared by
+# all workers; writes through this module evict both, other workers see the
+# change once their local entry expires. Evictions also bump a per-course
+# version, and a reader only stores what it loaded if that version has not
+# moved since, so a row read before a write is never cached after it.
+META_CACHE_TTL_SECONDS = 60
+META_REDIS_TTL_SECONDS = 300
+META_FIELDS = ["instructor_id", "published", "title"]
+_META_CACHE = TTLCache(maxsize=10_000, ttl=META_CACHE_TTL_SECONDS)
+_META_CACHE_LOCK = threading.Lock()
+
+class CourseMeta(NamedTuple):
+    instructor_id: str
+    published: bool
+    title: str
+
+def _meta_key(course_id: uuid.UUID) -> str:
+    return f"courses:meta:{course_id}"
+
+def _meta_version_key(course_id: uuid.UUID) -> str:
+    return f"courses:meta:version:{course_id}"
 
 class CRUDCourse:
     def get_by_instructor(
@@ -18,7 +54,7 @@ class CRUDCourse:
         query = db.query(Course).filter(Course.instructor_id == instructor_id)
         if published_only:
             query = query.filter(Course.published == True)
-        query = query.order_by(desc(Course.created_at))
+        query = query.order_by(desc(Course.created_at), desc(Course.id))
         return query.offset(skip).limit(limit).all()
     
     def count_by_instructor(
@@ -33,116 +69,193 @@ class CRUDCourse:
             query = query.filter(Course.published == True)
         return query.count()
 
-    def get(self, db: Session, course_id: uuid.UUID) -> Optional[Course]:
-        return db.query(Course).filter(Course.id == course_id).first()
+    def get(self, db: Session, course_id: uuid.UUID, options: Sequence = ()) -> Optional[Course]:
+        return db.query(Course).options(*options).filter(Course.id == course_id).first()
+    
+    def get_meta(self, db: Session, course_id: uuid.UUID) -> Optional[CourseMeta]:
+        """Owner, published flag and title of a course, without loading the row"""
+        with _META_CACHE_LOCK:
+            meta = _META_CACHE.get(course_id)
+        if meta is not None:
+            return meta
+        
+        cached = get_hash_fields(_meta_key(course_id), META_FIELDS)
+        if cached is not None:
+            instructor_id, published, title = cached
+            meta = CourseMeta(instructor_id.decode(), published == b"1", title.decode())
+        else:
+            # Read the version before the row, so a write in between is caught
+            version = get_version(_meta_version_key(course_id))
+            row = db.execute(
+                select(Course.instructor_id, Course.published, Course.title).where(Course.id == course_id)
+            ).first()
+            if row is None:
+                return None
+            meta = CourseMeta(*row)
+            if version is not None and not set_hash(
+                _meta_key(course_id),
+                {"instructor_id": meta.instructor_id, "published": int(meta.published), "title": meta.title},
+                ttl=META_REDIS_TTL_SECONDS,
+                version_key=_meta_version_key(course_id),
+                version=version
+            ):
+                # Possibly stale already; use it for this call only
+                return meta
+        with _META_CACHE_LOCK:
+            _META_CACHE[course_id] = meta
+        return meta
+    
+    def _evict_meta(self, course_id: uuid.UUID):
+        with _META_CACHE_LOCK:
+            _META_CACHE.pop(course_id, None)
+        invalidate_cache(_meta_key(course_id), _meta_version_key(course_id))
+    
+    def _apply_filters(self, query, filters: Optional[CourseFilters] = None):
+        """Apply the list filters shared by get_multi, get_multi_with_total and count"""
+        if filters is None:
+            return query
+        
+        # Special handling for current instructor: show own courses + published courses from others
+        if filters.current_instructor_id is not None:
+            instructor_id = filters.current_instructor_id
+            
+            # Base condition: own courses OR published courses
+            base_condition = or_(
+                Course.instructor_id == instructor_id,
+                Course.published == True
+            )
+            
+            # If published filter is explicitly set, apply it
+            if filters.published is not None:
+                if filters.published == True:
+                    # Only published courses (own + others)
+                    base_condition = and_(
+                        base_condition,
+                        Course.published == True
+                    )
+                else:
+                    # Only unpublished courses (must be own)
+                    base_condition = and_(
+                        Course.instructor_id == instructor_id,
+                        Course.published == False
+                    )
+            
+            query = query.filter(base_condition)
+        else:
+            # Standard filtering for non-instructor users
+            if filters.published is not None:
+                query = query.filter(Course.published == filters.published)
+            if filters.instructor_id is not None:
+                query = query.filter(Course.instructor_id == filters.instructor_id)
+        
+        # Apply other filters (common to all users)
+        if filters.category is not None:
+            query = query.filter(Course.category == filters.category)
+        if filters.level is not None:
+            query = query.filter(Course.level == filters.level)
+        if filters.is_featured is not None:
+            query = query.filter(Course.is_featured == filters.is_featured)
+        if filters.search is not None:
+            # Matches whole (stemmed) words via the GIN-indexed search_vector
+            query = query.filter(
+                Course.search_vector.op("@@")(func.plainto_tsquery("english", filters.search))
+            )
+        return query
     
     def get_multi(
         self, 
         db: Session, 
         skip: int = 0, 
         limit: int = 100,
-        filters: Optional[Dict[str, Any]] = None
+        filters: Optional[CourseFilters] = None,
+        options: Sequence = (),
+        after: Optional[Tuple[datetime, uuid.UUID]] = None
     ) -> List[Course]:
-        query = db.query(Course)
-        
-        # Apply filters
-        if filters:
-            # Special handling for current instructor: show own courses + published courses from others
-            if "current_instructor_id" in filters:
-                instructor_id = filters["current_instructor_id"]
-                
-                # Base condition: own courses OR published courses
-                base_condition = or_(
-                    Course.instructor_id == instructor_id,
-                    Course.published == True
-                )
-                
-                # If published filter is explicitly set, apply it
-                if "published" in filters:
-                    if filters["published"] == True:
-                        # Only published courses (own + others)
-                        base_condition = and_(
-                            base_condition,
-                            Course.published == True
-                        )
-                    else:
-                        # Only unpublished courses (must be own)
-                        base_condition = and_(
-                            Course.instructor_id == instructor_id,
-                            Course.published == False
-                        )
-                
-                query = query.filter(base_condition)
-            else:
-                # Standard filtering for non-instructor users
-                if "published" in filters:
-                    query = query.filter(Course.published == filters["published"])
-                if "instructor_id" in filters:
-                    query = query.filter(Course.instructor_id == filters["instructor_id"])
-            
-            # Apply other filters (common to all users)
-            if "category" in filters:
-                query = query.filter(Course.category == filters["category"])
-            if "level" in filters:
-                query = query.filter(Course.level == filters["level"])
-            if "is_featured" in filters:
-                query = query.filter(Course.is_featured == filters["is_featured"])
-            if "search" in filters:
-                search_term = f"%{filters['search']}%"
-                query = query.filter(
-                    or_(
-                        Course.title.ilike(search_term),
-                        Course.description.ilike(search_term),
-                        Course.short_description.ilike(search_term)
-                    )
-                )
+        """
+        Get a page of courses, newest first.
+        `after` is a (created_at, id) keyset cursor: only courses sorting
+        after it are returned, so deep pages cost no more than the first.
+        """
+        query = self._apply_filters(db.query(Course).options(*options), filters)
+        if after is not None:
+            query = query.filter(tuple_(Course.created_at, Course.id) < after)
         
-        # Order by created date (newest first)
-        query = query.order_by(desc(Course.created_at))
+        # Order by created date (newest first), id breaks ties for the cursor
+        query = query.order_by(desc(Course.created_at), desc(Course.id))
         
         return query.offset(skip).limit(limit).all()
     
+    def get_multi_with_total(
+        self, 
+        db: Session, 
+        skip: int = 0, 
+        limit: int = 100,
+        filters: Optional[CourseFilters] = None,
+        options: Sequence = ()
+    ) -> Tuple[List[Course], int]:
+        """
+        Get a page of courses and the total match count in one query
+        (or from the count cache for the public catalog filters).
+        COUNT(*) OVER () is evaluated before OFFSET/LIMIT, so every row
+        carries the full total.
+        """
+        if (filters or CourseFilters()) in CACHED_COUNT_FILTERS:
+            courses = self.get_multi(db, skip=skip, limit=limit, filters=filters, options=options)
+            return courses, self.cached_count(db, filters=filters)
+        
+        query = self._apply_filters(
+            db.query(Course, func.count().over().label("total")).options(*options), filters
+        )
+        query = query.order_by(desc(Course.created_at), desc(Course.id))
+        rows = query.offset(skip).limit(limit).all()
+        
+        if rows:
+            return [row.Course for row in rows], rows[0].total
+        # A page past the end has no row to carry the total
+        return [], self.count(db, filters=filters) if skip else 0
+    
     ##### IMPORTANT NOTES:
     # "Nullable=False" type of Course fields are
     # accepted null!!!
     #####
-    def create_from_form(self, db: Session, *, obj_in: CourseCreateForm, instructor_id: str) -> Course:
+    def create_from_form(
+        self,
+        db: Session,
+        *,
+        obj_in: CourseCreateForm,
+        instructor_id: str,
+        course_id: Optional[uuid.UUID] = None,
+        thumbnail_url: Optional[str] = None
+    ) -> Course:
         """
-        Create course from form data (without thumbnail)
+        Create course from form data
+        course_id lets the caller pick the ID up front, e.g. to name the
+        thumbnail object before the row exists.
         """
         db_obj = Course(
-            **obj_in.dict(),
+            **obj_in.model_dump(),
             instructor_id=instructor_id,
-            thumbnail_url=None  # Will be set after upload
+            thumbnail_url=thumbnail_url
         )
+        if course_id is not None:
+            db_obj.id = course_id
         db.add(db_obj)
         db.commit()
         db.refresh(db_obj)
         return db_obj
     
-    def update_thumbnail(self, db: Session, *, course_id: uuid.UUID, thumbnail_url: str) -> Course:
-        """
-        Update course thumbnail URL
-        """
-        course = self.get(db, course_id=course_id)
-        if not course:
-            return None
-        
-        course.thumbnail_url = thumbnail_url
-        db.add(course)
-        db.commit()
-        db.refresh(course)
-        return course
-    
     # Keep existing update and delete methods
     def update(
         self, 
         db: Session, 
         *, 
         db_obj: Course, 
-        obj_in: CourseUpdateForm
+        obj_in: Union[CourseUpdateForm, Dict[str, Any]]
     ) -> Course:
-        update_data = obj_in.dict(exclude_unset=True, exclude={"thumbnail"})
+        if isinstance(obj_in, dict):
+            update_data = obj_in
+        else:
+            update_data = obj_in.model_dump(exclude_unset=True, exclude={"thumbnail"})
         
         for field in update_data:
             setattr(db_obj, field, update_data[field])
@@ -150,56 +263,107 @@ class CRUDCourse:
         db.add(db_obj)
         db.commit()
         db.refresh(db_obj)
+        self._evict_meta(db_obj.id)
         return db_obj
     
+    def update_owned(
+        self,
+        db: Session,
+        *,
+        course_id: uuid.UUID,
+        instructor_id: str,
+        values: Dict[str, Any]
+    ) -> Optional[Tuple[Course, Optional[str]]]:
+        """
+        Update a course only if it belongs to the instructor, in one
+        UPDATE ... RETURNING. Returns the updated course and its thumbnail_url
+        from before the update, or None if no owned course matched.
+        """
+        if "thumbnail_url" not in values:
+            # Thumbnail untouched, so the current value is also the old one
+            stmt = (
+                update(Course)
+                .where(Course.id == course_id, Course.instructor_id == instructor_id)
+                .values(**values)
+                .returning(Course, Course.thumbnail_url)
+            )
+        else:
+            # Locked pre-update row, so RETURNING can report the old thumbnail
+            previous = (
+                select(Course.id, Course.thumbnail_url)
+                .where(Course.id == course_id)
+                .with_for_update()
+                .subquery()
+            )
+            stmt = (
+                update(Course)
+                .where(Course.id == previous.c.id, Course.instructor_id == instructor_id)
+                .values(**values)
+                .returning(Course, previous.c.thumbnail_url)
+            )
+        row = db.execute(stmt).first()
+        if row is not None:
+            # Detached, so the commit does not expire what RETURNING loaded
+            db.expunge(row[0])
+        db.commit()
+        self._evict_meta(course_id)
+        return (row[0], row[1]) if row else None
+    
+    def delete_owned(
+        self,
+        db: Session,
+        *,
+        course_id: uuid.UUID,
+        instructor_id: str
+    ) -> Optional[Row]:
+        """
+        Delete a course only if it belongs to the instructor, in one
+        DELETE ... RETURNING. Lessons and enrollments go with it through
+        ON DELETE CASCADE. Returns the deleted (id, thumbnail_url) row, or
+        None if no owned course matched.
+        """
+        row = db.execute(
+            delete(Course)
+            .where(Course.id == course_id, Course.instructor_id == instructor_id)
+            .returning(Course.id, Course.thumbnail_url)
+        ).first()
+        db.commit()
+        self._evict_meta(course_id)
+        return row
+    
     def delete(self, db: Session, *, course_id: uuid.UUID) -> Course:
         obj = db.query(Course).get(course_id)
         db.delete(obj)
         db.commit()
+        self._evict_meta(course_id)
         return obj
     
-    def count(self, db: Session, filters: Optional[Dict[str, Any]] = None) -> int:
-        query = db.query(Course)
-        
-        if filters:
-            # Special handling for current instructor: show own courses + published courses from others
-            if "current_instructor_id" in filters:
-                instructor_id = filters["current_instructor_id"]
-                
-                # Base condition: own courses OR published courses
-                base_condition = or_(
-                    Course.instructor_id == instructor_id,
-                    Course.published == True
-                )
-                
-                # If published filter is explicitly set, apply it
-                if "published" in filters:
-                    if filters["published"] == True:
-                        # Only published courses (own + others)
-                        base_condition = and_(
-                            base_condition,
-                            Course.published == True
-                        )
-                    else:
-                        # Only unpublished courses (must be own)
-                        base_condition = and_(
-                            Course.instructor_id == instructor_id,
-                            Course.published == False
-                        )
-                
-                query = query.filter(base_condition)
-            else:
-                # Standard filtering for non-instructor users
-                if "published" in filters:
-                    query = query.filter(Course.published == filters["published"])
-                if "instructor_id" in filters:
-                    query = query.filter(Course.instructor_id == filters["instructor_id"])
-            
-            # Apply other filters (common to all users)
-            if "category" in filters:
-                query = query.filter(Course.category == filters["category"])
-        
-        return query.count()
+    def get_fingerprint(self, db: Session, filters: Optional[CourseFilters] = None) -> Tuple[Any, int]:
+        """Latest updated_at and row count of the matching courses, in one query"""
+        query = self._apply_filters(
+            db.query(func.max(Course.updated_at), func.count(Course.id)), filters
+        )
+        return tuple(query.one())
+    
+    def count(self, db: Session, filters: Optional[CourseFilters] = None) -> int:
+        return self._apply_filters(db.query(Course), filters).count()
+    
+    def total(self, db: Session, filters: Optional[CourseFilters] = None) -> int:
+        """Exact match count, from the count cache for the public catalog filters"""
+        if (filters or CourseFilters()) in CACHED_COUNT_FILTERS:
+            return self.cached_count(db, filters=filters)
+        return self.count(db, filters=filters)
+    
+    def cached_count(self, db: Session, filters: Optional[CourseFilters] = None) -> int:
+        """Exact count, reused for COUNT_CACHE_TTL_SECONDS per filter set"""
+        key = filters or CourseFilters()
+        with _COUNT_CACHE_LOCK:
+            total = _COUNT_CACHE.get(key)
+        if total is None:
+            total = self.count(db, filters=filters)
+            with _COUNT_CACHE_LOCK:
+                _COUNT_CACHE[key] = total
+        return total
     
 
 
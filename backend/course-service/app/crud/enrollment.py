@@ -1,6 +1,7 @@
 from typing import List, Optional, Dict, Any, Tuple
-from sqlalchemy.orm import Session
-from sqlalchemy import desc, asc, func, and_, or_
+from sqlalchemy.orm import Session, contains_eager
+from sqlalchemy import desc, asc, func, and_, or_, case, update, select, true
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 import uuid
 from datetime import datetime, timedelta
 
@@ -26,16 +27,19 @@ class CRUDEnrollment:
             Enrollment.course_id == course_id
         ).first()
     
-    def get_user_enrollments(
-        self, 
-        db: Session, 
+    def _user_enrollments_query(
+        self,
+        query,
         user_id: str,
-        skip: int = 0,
-        limit: int = 100,
         filters: Optional[Dict[str, Any]] = None
-    ) -> List[Enrollment]:
-        """Get all enrollments for a user"""
-        query = db.query(Enrollment).filter(Enrollment.user_id == user_id)
+    ):
+        """Scope a query to a user's enrollments, joined with their course"""
+        query = (
+            query
+            .join(Enrollment.course)
+            .options(contains_eager(Enrollment.course))
+            .filter(Enrollment.user_id == user_id)
+        )
         
         # Apply filters
         if filters:
@@ -44,17 +48,93 @@ class CRUDEnrollment:
             if "course_id" in filters:
                 query = query.filter(Enrollment.course_id == filters["course_id"])
             if "search" in filters:
-                # Join with course for search
-                query = query.join(Course).filter(
+                query = query.filter(
                     Course.title.ilike(f"%{filters['search']}%") |
                     Course.description.ilike(f"%{filters['search']}%")
                 )
         
         # Order by last accessed (most recent first)
-        query = query.order_by(desc(Enrollment.last_accessed_at))
-        
+        return query.order_by(desc(Enrollment.last_accessed_at))
+    
+    def get_user_enrollments(
+        self, 
+        db: Session, 
+        user_id: str,
+        skip: int = 0,
+        limit: int = 100,
+        filters: Optional[Dict[str, Any]] = None
+    ) -> List[Enrollment]:
+        """Get all enrollments for a user, with their course loaded by the same query"""
+        query = self._user_enrollments_query(db.query(Enrollment), user_id, filters)
         return query.offset(skip).limit(limit).all()
     
+    def get_user_enrollments_with_total(
+        self,
+        db: Session,
+        user_id: str,
+        skip: int = 0,
+        limit: int = 100,
+        filters: Optional[Dict[str, Any]] = None
+    ) -> Tuple[List[Enrollment], int]:
+        """
+        Get a page of a user's enrollments and the total match count in one
+        query. COUNT(*) OVER () is evaluated before OFFSET/LIMIT, so every
+        row carries the full total.
+        """
+        query = self._user_enrollments_query(
+            db.query(Enrollment, func.count().over().label("total")), user_id, filters
+        )
+        rows = query.offset(skip).limit(limit).all()
+        
+        if rows:
+            return [row.Enrollment for row in rows], rows[0].total
+        # A page past the end has no row to carry the total
+        return [], query.order_by(None).count() if skip else 0
+    
+    def get_user_enrollments_with_stats(
+        self,
+        db: Session,
+        user_id: str,
+        skip: int = 0,
+        limit: int = 100,
+        filters: Optional[Dict[str, Any]] = None
+    ) -> Tuple[List[Tuple[Enrollment, int, int]], int, Dict[str, Any]]:
+        """
+        Like get_user_enrollments_with_total, plus the user's unfiltered
+        enrollment stats. The stats are a one-row aggregate cross joined onto
+        the page, so everything comes back in a single round trip.
+        Each item is (enrollment, total_lessons, completed_lessons), counted
+        by correlated subqueries rather than by loading lessons or progress.
+        """
+        total_lessons = (
+            select(func.count(Lesson.id))
+            .where(Lesson.course_id == Enrollment.course_id, Lesson.is_published == True)
+            .scalar_subquery()
+            .label("total_lessons")
+        )
+        completed_lessons = (
+            select(func.count(LessonProgress.id))
+            .where(LessonProgress.enrollment_id == Enrollment.id, LessonProgress.completed == True)
+            .scalar_subquery()
+            .label("completed_lessons")
+        )
+        stats = self._user_stats_query(user_id).subquery()
+        query = self._user_enrollments_query(
+            db.query(
+                Enrollment, total_lessons, completed_lessons,
+                func.count().over().label("total"), stats
+            ),
+            user_id, filters
+        ).join(stats, true())
+        rows = query.offset(skip).limit(limit).all()
+        
+        if rows:
+            items = [(row.Enrollment, row.total_lessons, row.completed_lessons) for row in rows]
+            return items, rows[0].total, self._stats_dict(rows[0])
+        # An empty page has no row to carry the total or the stats
+        total = query.order_by(None).count() if skip else 0
+        return [], total, self.get_user_stats(db, user_id)
+    
     def count_user_enrollments(
         self, 
         db: Session, 
@@ -77,30 +157,29 @@ class CRUDEnrollment:
         user_id: str,
         course_id: uuid.UUID
     ) -> Enrollment:
-        """Create a new enrollment"""
-        # Check if already enrolled
-        existing = self.get_by_user_and_course(db, user_id, course_id)
-        if existing:
-            return existing
-        
-        # Create enrollment
-        db_obj = Enrollment(
-            user_id=user_id,
-            course_id=course_id,
-            enrolled_at=datetime.utcnow(),
-            last_accessed_at=datetime.utcnow()
-        )
+        """
+        Create a new enrollment, or return the existing one.
+        INSERT ... ON CONFLICT DO NOTHING makes concurrent duplicate requests
+        safe; the SELECT only runs when the user was already enrolled.
+        """
+        now = datetime.utcnow()
+        db_obj = db.scalars(
+            pg_insert(Enrollment)
+            .values(user_id=user_id, course_id=course_id, enrolled_at=now, last_accessed_at=now)
+            .on_conflict_do_nothing(constraint="unique_user_course_enrollment")
+            .returning(Enrollment)
+        ).first()
         
-        db.add(db_obj)
-        db.commit()
-        db.refresh(db_obj)
+        if db_obj is None:
+            return self.get_by_user_and_course(db, user_id, course_id)
         
         # Update course enrollment count
-        course = db.query(Course).filter(Course.id == course_id).first()
-        if course:
-            course.total_enrollments += 1
-            db.add(course)
-            db.commit()
+        db.execute(
+            update(Course)
+            .where(Course.id == course_id)
+            .values(total_enrollments=Course.total_enrollments + 1)
+        )
+        db.commit()
         
         return db_obj
     
@@ -112,7 +191,7 @@ class CRUDEnrollment:
         obj_in: EnrollmentUpdate
     ) -> Enrollment:
         """Update enrollment"""
-        update_data = obj_in.dict(exclude_unset=True)
+        update_data = obj_in.model_dump(exclude_unset=True)
         
         # Update last_accessed_at if progress is being updated
         if "progress_percentage" in update_data:
@@ -181,17 +260,20 @@ class CRUDEnrollment:
         """Count enrollments for a course"""
         return db.query(Enrollment).filter(Enrollment.course_id == course_id).count()
     
-    def get_user_stats(self, db: Session, user_id: str) -> Dict[str, Any]:
-        """Get enrollment statistics for a user"""
-        from sqlalchemy import func
-        
-        stats = db.query(
+    def _user_stats_query(self, user_id: str):
+        """One-row aggregate of a user's enrollments"""
+        return select(
             func.count(Enrollment.id).label('total_enrollments'),
             func.count(case((Enrollment.completed == True, 1))).label('completed_enrollments'),
             func.avg(Enrollment.progress_percentage).label('average_progress'),
             func.sum(Enrollment.total_time_spent_minutes).label('total_time_spent')
-        ).filter(Enrollment.user_id == user_id).first()
-        
+        ).where(Enrollment.user_id == user_id)
+    
+    def get_user_stats(self, db: Session, user_id: str) -> Dict[str, Any]:
+        """Get enrollment statistics for a user"""
+        return self._stats_dict(db.execute(self._user_stats_query(user_id)).first())
+    
+    def _stats_dict(self, stats) -> Dict[str, Any]:
         return {
             'total_enrollments': stats.total_enrollments or 0,
             'completed_enrollments': stats.completed_enrollments or 0,
@@ -215,40 +297,33 @@ class CRUDEnrollment:
             grouped_enrollments: List of dicts with course_id, course_title, items[]
             total_count: Total number of enrollments (for pagination)
         """
-        # Import here to avoid circular imports
-        from .course import course as course_crud
-        
-        # Get all courses belonging to this instructor
-        instructor_courses = course_crud.get_by_instructor(db, instructor_id=instructor_id)
-        if not instructor_courses:
-            return [], 0
-        
-        course_ids = [course.id for course in instructor_courses]
-        
-        # Get total count of enrollments for these courses
-        total = db.query(Enrollment).filter(
-            Enrollment.course_id.in_(course_ids)
-        ).count()
-        
-        # Get paginated enrollments with course details
-        from ..models.course import Course
-        
-        enrollments_query = db.query(
+        # One query: the instructor's courses are joined rather than loaded
+        # first, and COUNT(*) OVER () carries the total on every row
+        rows = db.query(
             Enrollment,
-            Course.title.label('course_title')
+            Course.title.label('course_title'),
+            func.count().over().label('total')
         ).join(
             Course, Enrollment.course_id == Course.id
         ).filter(
-            Enrollment.course_id.in_(course_ids)
+            Course.instructor_id == instructor_id
         ).order_by(
             desc(Enrollment.enrolled_at)  # Most recent first
-        ).offset(skip).limit(limit)
-        
-        enrollments_data = enrollments_query.all()
+        ).offset(skip).limit(limit).all()
+        
+        if rows:
+            total = rows[0].total
+        elif skip:
+            # A page past the end has no row to carry the total
+            total = db.query(Enrollment).join(
+                Course, Enrollment.course_id == Course.id
+            ).filter(Course.instructor_id == instructor_id).count()
+        else:
+            return [], 0
         
         # Group enrollments by course
         grouped = {}
-        for enrollment, course_title in enrollments_data:
+        for enrollment, course_title, _ in rows:
             course_id_str = str(enrollment.course_id)
             
             if course_id_str not in grouped:
@@ -1,7 +1,10 @@
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Tuple
 from sqlalchemy.orm import Session
-from sqlalchemy import desc, asc
+from sqlalchemy.engine import Row
+from sqlalchemy import desc, asc, select, func, delete, update, tuple_
+from datetime import datetime
 import uuid
+from ..models.course import Course
 from ..models.lesson import Lesson
 from ..schemas.lesson import LessonCreateForm, LessonUpdate
 
@@ -27,24 +30,70 @@ class CRUDLesson:
         
         return query.all()
     
+    def get_content_urls(self, db: Session, course_id: uuid.UUID) -> List[str]:
+        """Get the content file URLs of every lesson in a course, without loading lessons"""
+        return db.scalars(
+            select(Lesson.content_url).where(
+                Lesson.course_id == course_id,
+                Lesson.content_url.isnot(None)
+            )
+        ).all()
+    
     def get_by_course_paginated(
         self,
         db: Session,
         course_id: uuid.UUID,
         skip: int = 0,
         limit: int = 100,
-        published_only: bool = True
+        published_only: bool = True,
+        after: Optional[Tuple[int, datetime, uuid.UUID]] = None
     ) -> List[Lesson]:
-        """Get paginated lessons for a course"""
+        """
+        Get paginated lessons for a course.
+        `after` is an (order_index, created_at, id) keyset cursor: only
+        lessons sorting after it are returned, so deep pages stay cheap.
+        """
         query = db.query(Lesson).filter(Lesson.course_id == course_id)
         
         if published_only:
             query = query.filter(Lesson.is_published == True)
+        if after is not None:
+            query = query.filter(tuple_(Lesson.order_index, Lesson.created_at, Lesson.id) > after)
         
-        query = query.order_by(asc(Lesson.order_index), asc(Lesson.created_at))
+        # id breaks ties so the cursor order is total
+        query = query.order_by(asc(Lesson.order_index), asc(Lesson.created_at), asc(Lesson.id))
         
         return query.offset(skip).limit(limit).all()
     
+    def get_by_course_with_total(
+        self,
+        db: Session,
+        course_id: uuid.UUID,
+        skip: int = 0,
+        limit: int = 100,
+        published_only: bool = True
+    ) -> Tuple[List[Lesson], int]:
+        """
+        Get a page of a course's lessons and the total count in one query;
+        COUNT(*) OVER () carries the full total on every row.
+        """
+        query = db.query(Lesson, func.count().over().label("total")).filter(
+            Lesson.course_id == course_id
+        )
+        
+        if published_only:
+            query = query.filter(Lesson.is_published == True)
+        
+        rows = (
+            query.order_by(asc(Lesson.order_index), asc(Lesson.created_at), asc(Lesson.id))
+            .offset(skip).limit(limit).all()
+        )
+        
+        if rows:
+            return [row.Lesson for row in rows], rows[0].total
+        # A page past the end has no row to carry the total
+        return [], self.count_by_course(db, course_id, published_only) if skip else 0
+    
     def count_by_course(
         self, 
         db: Session, 
@@ -68,7 +117,7 @@ class CRUDLesson:
     ) -> Lesson:
         """Create lesson from form data"""
         db_obj = Lesson(
-            **obj_in.dict(exclude={"content_url"} if hasattr(obj_in, 'content_url') else {}),
+            **obj_in.model_dump(exclude={"content_url"} if hasattr(obj_in, 'content_url') else {}),
             content_url=content_url
         )
         db.add(db_obj)
@@ -86,6 +135,25 @@ class CRUDLesson:
         """Create lesson (alias for create_from_form)"""
         return self.create_from_form(db, obj_in=obj_in, content_url=content_url)
     
+    def _update_returning(
+        self,
+        db: Session,
+        lesson_id: uuid.UUID,
+        values: Dict[str, Any]
+    ) -> Optional[Lesson]:
+        """
+        Write values and read the fresh row back in one UPDATE ... RETURNING.
+        The lesson is detached before the commit, so reading it afterwards
+        does not trigger a reload.
+        """
+        db_obj = db.scalars(
+            update(Lesson).where(Lesson.id == lesson_id).values(**values).returning(Lesson)
+        ).first()
+        if db_obj is not None:
+            db.expunge(db_obj)
+        db.commit()
+        return db_obj
+    
     def update(
         self, 
         db: Session, 
@@ -94,33 +162,11 @@ class CRUDLesson:
         obj_in: LessonUpdate
     ) -> Lesson:
         """Update lesson"""
-        update_data = obj_in.dict(exclude_unset=True)
+        update_data = obj_in.model_dump(exclude_unset=True)
+        if not update_data:
+            return db_obj
         
-        for field in update_data:
-            setattr(db_obj, field, update_data[field])
-        
-        db.add(db_obj)
-        db.commit()
-        db.refresh(db_obj)
-        return db_obj
-    
-    def update_content_url(
-        self, 
-        db: Session, 
-        *, 
-        lesson_id: uuid.UUID, 
-        content_url: str
-    ) -> Lesson:
-        """Update lesson content URL"""
-        lesson = self.get(db, lesson_id=lesson_id)
-        if not lesson:
-            return None
-        
-        lesson.content_url = content_url
-        db.add(lesson)
-        db.commit()
-        db.refresh(lesson)
-        return lesson
+        return self._update_returning(db, db_obj.id, update_data)
     
     def delete(self, db: Session, *, lesson_id: uuid.UUID) -> Lesson:
         """Delete lesson"""
@@ -129,6 +175,30 @@ class CRUDLesson:
         db.commit()
         return obj
     
+    def delete_owned(
+        self,
+        db: Session,
+        *,
+        lesson_id: uuid.UUID,
+        instructor_id: Optional[str] = None
+    ) -> Optional[Row]:
+        """
+        Delete a lesson only if its course belongs to the instructor (any
+        course when instructor_id is None), in one DELETE ... RETURNING.
+        Returns the deleted (id, course_id, content_url) row, or None if no
+        matching lesson was found.
+        """
+        stmt = delete(Lesson).where(Lesson.id == lesson_id)
+        if instructor_id is not None:
+            stmt = stmt.where(
+                Lesson.course_id.in_(select(Course.id).where(Course.instructor_id == instructor_id))
+            )
+        row = db.execute(
+            stmt.returning(Lesson.id, Lesson.course_id, Lesson.content_url)
+        ).first()
+        db.commit()
+        return row
+    
     def get_next_order_index(self, db: Session, course_id: uuid.UUID) -> int:
         """Get the next order index for a new lesson in the course"""
         last_lesson = db.query(Lesson).filter(
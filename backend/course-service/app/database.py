@@ -6,11 +6,22 @@ from .models.base import Base
 settings = get_settings()
 
 # Create engine
+# In docker-compose the URL points at PgBouncer (transaction pooling), so
+# these connections are cheap client slots rather than Postgres backends.
+# Sync endpoints run in the threadpool; main.py sizes it to this pool so
+# every worker thread can hold a connection.
+DB_POOL_SIZE = settings.database_pool_size
+DB_MAX_OVERFLOW = settings.database_max_overflow
+
 engine = create_engine(
     settings.database_url,
     pool_pre_ping=True,
-    pool_size=20,
-    max_overflow=30,
+    pool_size=DB_POOL_SIZE,
+    max_overflow=DB_MAX_OVERFLOW,
+    # Fail fast instead of queueing requests behind an exhausted pool
+    pool_timeout=5,
+    # Recycle before PgBouncer/Postgres idle timeouts drop connections
+    pool_recycle=1800,
     echo=settings.debug
 )
 
@@ -1,13 +1,14 @@
 from fastapi import FastAPI, Depends
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, ORJSONResponse
 from contextlib import asynccontextmanager
 import logging
 
+import anyio.to_thread
+
 from .core.config import get_settings
-from .database import create_tables, engine
+from .database import create_tables, engine, DB_POOL_SIZE, DB_MAX_OVERFLOW
 from .api.v1 import courses, lessons, enrollments
-from .api.dependencies import get_database
 
 # Configure logging
 logging.basicConfig(
@@ -28,6 +29,11 @@ async def lifespan(app: FastAPI):
     logger.info(f"Database URL: {settings.database_url}")
     logger.info(f"MinIO Endpoint: {settings.minio_endpoint}")
     
+    # Route handlers are sync and run in AnyIO's threadpool (40 threads by
+    # default); match it to the DB pool so concurrency is bounded by
+    # connections, not threads
+    anyio.to_thread.current_default_thread_limiter().total_tokens = DB_POOL_SIZE + DB_MAX_OVERFLOW
+    
     # Create tables if they don't exist
     try:
         create_tables()
@@ -49,7 +55,8 @@ app = FastAPI(
     openapi_url="/api/v1/openapi.json",
     docs_url="/api/v1/docs",
     redoc_url="/api/v1/redoc",
-    lifespan=lifespan
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse
 )
 
 # Configure CORS
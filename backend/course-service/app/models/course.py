@@ -1,11 +1,26 @@
-from sqlalchemy import Column, String, Text, Float, Boolean, Integer, ForeignKey
-from sqlalchemy.orm import relationship
-from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy import Column, String, Text, Float, Boolean, Integer, ForeignKey, Computed, Index
+from sqlalchemy.orm import relationship, deferred
+from sqlalchemy.dialects.postgresql import UUID, TSVECTOR
 from .base import BaseModel
 import uuid
 
+# Kept in sync by Postgres on every write; backs the catalog `search` filter
+SEARCH_VECTOR_EXPRESSION = (
+    "to_tsvector('english', coalesce(title, '') || ' ' || "
+    "coalesce(short_description, '') || ' ' || coalesce(description, ''))"
+)
+
 class Course(BaseModel):
     __tablename__ = "courses"
+    __table_args__ = (
+        Index("courses_search_idx", "search_vector", postgresql_using="gin"),
+        Index("courses_published_category_level_idx", "published", "category", "level"),
+        # Newest-first keyset pagination on (created_at, id)
+        Index("courses_created_at_id_idx", "created_at", "id"),
+        # The same order within the public catalog and one instructor's courses
+        Index("courses_published_created_at_id_idx", "published", "created_at", "id"),
+        Index("courses_instructor_created_at_id_idx", "instructor_id", "created_at", "id"),
+    )
     
     # Course information
     title = Column(String(255), nullable=False, index=True)  # Course title
@@ -14,7 +29,7 @@ class Course(BaseModel):
     price = Column(Float, default=0.0, nullable=False)  # Price (0.0 = free)
     
     # User reference (from User Service)
-    instructor_id = Column(String(255), nullable=False, index=True)  # Instructor user ID
+    instructor_id = Column(String(255), nullable=False)  # Instructor user ID
     
     # Course metadata
     category = Column(String(100), nullable=True, index=True)  # Main category
@@ -34,6 +49,10 @@ class Course(BaseModel):
     total_ratings = Column(Integer, default=0)  # Number of ratings
     total_enrollments = Column(Integer, default=0)  # Number of enrollments
     
+    # Full-text search
+    # Generated and read-only; deferred so course queries don't load it
+    search_vector = deferred(Column(TSVECTOR, Computed(SEARCH_VECTOR_EXPRESSION, persisted=True)))
+    
     # Relationships
     lessons = relationship("Lesson", back_populates="course", cascade="all, delete-orphan")  # Course lessons
     enrollments = relationship("Enrollment", back_populates="course", cascade="all, delete-orphan")  # Student enrollments
\ No newline at end of file
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Text, Integer, Boolean, ForeignKey
+from sqlalchemy import Column, String, Text, Integer, Boolean, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.dialects.postgresql import UUID
 from .base import BaseModel
@@ -6,6 +6,13 @@ import uuid
 
 class Lesson(BaseModel):
     __tablename__ = "lessons"
+    __table_args__ = (
+        # Lesson pages in display order, and published lesson counts per course
+        Index(
+            "lessons_course_published_order_idx",
+            "course_id", "is_published", "order_index", "created_at"
+        ),
+    )
     
     # Foreign keys
     course_id = Column(UUID(as_uuid=True), ForeignKey("courses.id", ondelete="CASCADE"), nullable=False, index=True)  # Parent course
@@ -1,5 +1,6 @@
 from pydantic import BaseModel, Field, validator, ConfigDict
 from typing import Optional, List
+from dataclasses import dataclass
 from datetime import datetime
 import uuid
 from enum import Enum
@@ -90,8 +91,7 @@ class CourseUpdateResponse(CourseInDB):
     """Response schema for course update"""
     thumbnail_updated: bool = False
     
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 class CourseResponse(CourseInDB):
@@ -102,4 +102,35 @@ class CourseListResponse(BaseModel):
     total: int
     page: int
     size: int
-    pages: int
\ No newline at end of file
+    pages: int
+    # Pass as `cursor` to fetch the next page; None on the last page
+    next_cursor: Optional[str] = None
+
+@dataclass(frozen=True, slots=True)
+class CourseFilters:
+    """
+    Course list filters; None leaves a field unfiltered.
+    Frozen, so it can key the count and listing caches directly.
+    """
+    published: Optional[bool] = None
+    instructor_id: Optional[str] = None
+    # Own courses (any status) plus other instructors' published ones
+    current_instructor_id: Optional[str] = None
+    category: Optional[str] = None
+    level: Optional[CourseLevel] = None
+    is_featured: Optional[bool] = None
+    search: Optional[str] = None
+
+class ThumbnailPresignRequest(BaseModel):
+    """Schema for requesting a presigned thumbnail upload URL"""
+    filename: str = Field(..., min_length=1, max_length=255)
+
+class ThumbnailPresignResponse(BaseModel):
+    """Presigned PUT URL the client uploads the thumbnail to"""
+    url: str
+    object_key: str
+    expires_in: int
+
+class ThumbnailConfirm(BaseModel):
+    """Schema for attaching an uploaded thumbnail to a course"""
+    object_key: str = Field(..., min_length=1)
@@ -1,4 +1,4 @@
-from pydantic import BaseModel, Field, validator
+from pydantic import BaseModel, Field, validator, ConfigDict
 from typing import Optional, List
 from datetime import datetime
 import uuid
@@ -63,8 +63,7 @@ class EnrollmentInDB(EnrollmentBase):
     created_at: datetime
     updated_at: datetime
     
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 class EnrollmentResponse(EnrollmentInDB):
     """Enrollment response schema"""
@@ -78,8 +77,7 @@ class EnrollmentWithCourse(EnrollmentResponse):
     total_lessons: int = 0
     completed_lessons: int = 0
     
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 class EnrollmentStats(BaseModel):
     """Enrollment statistics"""
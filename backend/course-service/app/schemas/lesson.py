@@ -1,4 +1,4 @@
-from pydantic import BaseModel, Field, validator, field_validator
+from pydantic import BaseModel, Field, validator, field_validator, ConfigDict
 from typing import Optional
 from datetime import datetime
 import uuid
@@ -85,8 +85,7 @@ class LessonInDB(LessonBase):
     created_at: datetime
     updated_at: datetime
     
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 class LessonResponse(LessonInDB):
     """Lesson response schema"""
@@ -99,9 +98,21 @@ class LessonListResponse(BaseModel):
     page: int
     size: int
     pages: int
+    # Pass as `cursor` to fetch the next page; None on the last page
+    next_cursor: Optional[str] = None
 
 class LessonUploadResponse(BaseModel):
     """Response for lesson upload"""
     lesson_id: uuid.UUID
     content_url: str
-    message: str
\ No newline at end of file
+    message: str
+
+class LessonContentPresignRequest(BaseModel):
+    """Schema for requesting a presigned lesson content upload URL"""
+    filename: str = Field(..., min_length=1, max_length=255)
+
+class LessonContentPresignResponse(BaseModel):
+    """Presigned PUT URL the client uploads lesson content to"""
+    url: str
+    object_key: str
+    expires_in: int
@@ -0,0 +1,23 @@
+import unittest
+
+from app.core.etag import etag_matches
+
+
+class EtagMatchesTest(unittest.TestCase):
+    def test_matches_any_tag_in_the_list(self):
+        self.assertTrue(etag_matches('W/"a", W/"b"', 'W/"b"'))
+
+    def test_comparison_is_weak(self):
+        self.assertTrue(etag_matches('"b"', 'W/"b"'))
+        self.assertTrue(etag_matches('W/"b"', '"b"'))
+
+    def test_star_matches(self):
+        self.assertTrue(etag_matches("*", 'W/"b"'))
+
+    def test_no_match(self):
+        self.assertFalse(etag_matches(None, 'W/"b"'))
+        self.assertFalse(etag_matches('W/"a", "c"', 'W/"b"'))
+
+
+if __name__ == "__main__":
+    unittest.main()